@@ -5,33 +5,144 @@ Handles SQLite database initialization and connection management
 
 import sqlite3
 import os
-from datetime import datetime
-from typing import Optional
+import atexit
+import logging
+import threading
+from urllib.parse import parse_qs, unquote, urlsplit
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
+
+
+# Database file, or a file: URI; EXPENSE_DB_PATH overrides the default
+DB_PATH = os.environ.get('EXPENSE_DB_PATH', 'expenses.db')
+
+logger = logging.getLogger(__name__)
+
+# Each thread keeps one open connection for its lifetime
+_tls = threading.local()
+
+# Called after transaction() rolls back, so callers holding copies of rows
+# (such as the models caches) can drop data that was never committed
+_rollback_hooks: List[Callable[[], None]] = []
+
+
+def on_rollback(hook: Callable[[], None]) -> None:
+    """
+    Register a function to call whenever transaction() rolls back
+    
+    Args:
+        hook: Function taking no arguments
+    """
+    _rollback_hooks.append(hook)
+
+
+def _run_rollback_hooks() -> None:
+    """Call every registered rollback hook"""
+    for hook in _rollback_hooks:
+        hook()
 
 
 def get_connection() -> sqlite3.Connection:
     """
-    Create and return a database connection with foreign key support enabled
+    Return the calling thread's database connection, opening it on first use
+    The connection is cached so the file open and PRAGMA setup happen once
+    and its prepared-statement cache stays warm between calls
     
     Returns:
-        sqlite3.Connection: Database connection with foreign keys enabled
+        sqlite3.Connection: Database connection with foreign keys enabled and
+        sqlite3.Row rows
     """
-    conn = sqlite3.connect('expenses.db')
-    conn.execute("PRAGMA foreign_keys = ON")
+    conn = getattr(_tls, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256, uri=True)
+        # Rows can be read by column name without building a dict per row
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -20000")
+        conn.execute("PRAGMA mmap_size = 268435456")
+        _tls.conn = conn
     return conn
 
 
 def close_connection(conn: sqlite3.Connection) -> None:
     """
     Properly close database connection
+    Closing the cached connection makes the next get_connection() reopen it
     
     Args:
         conn: Database connection to close
     """
     if conn:
+        if getattr(_tls, 'conn', None) is conn:
+            _tls.conn = None
         conn.close()
 
 
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    """
+    Run the enclosed statements as a single transaction
+    Commits on success and rolls back on error. A block opened while a
+    transaction is already active runs as a SAVEPOINT inside it, so it only
+    undoes its own work on error and leaves the commit to the outer owner.
+    Hooks registered with on_rollback() run after either kind of rollback.
+    
+    Yields:
+        sqlite3.Connection: The cached database connection
+    """
+    conn = get_connection()
+    if conn.in_transaction:
+        conn.execute("SAVEPOINT nested")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK TO nested")
+            conn.execute("RELEASE nested")
+            _run_rollback_hooks()
+            raise
+        conn.execute("RELEASE nested")
+    else:
+        # Begin explicitly so nested blocks see the transaction even before
+        # the first write
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            _run_rollback_hooks()
+            raise
+        conn.commit()
+
+
+@atexit.register
+def _close_cached_connection() -> None:
+    """
+    Close the main thread's cached connection on interpreter exit
+    Runs PRAGMA optimize first so SQLite can refresh planner statistics that
+    the session's queries showed to be missing or stale; init_database only
+    analyzes indexes it has just created
+    """
+    conn = getattr(_tls, 'conn', None)
+    if conn:
+        try:
+            conn.execute("PRAGMA optimize")
+        except sqlite3.Error as e:
+            logger.warning("PRAGMA optimize failed: %s", e)
+    close_connection(conn)
+
+
+# Indexes on Expenses by name, with their columns. The listing orders by
+# date, then created_at, then id, since created_at alone is not unique.
+_EXPENSE_INDEXES = {
+    'idx_expenses_user_date': 'user_id, date DESC, created_at DESC, id DESC',
+    'idx_expenses_cat_date': 'category_id, date DESC, created_at DESC, id DESC',
+    'idx_expenses_date_user_cat': 'date, user_id, category_id, amount',
+}
+
+
 def init_database() -> None:
     """
     Initialize the database with required tables and default categories
@@ -41,11 +152,16 @@ def init_database() -> None:
     cursor = conn.cursor()
     
     try:
+        _migrate_name_collation(conn)
+        
+        # Run the whole schema setup and seeding as a single transaction
+        cursor.execute("BEGIN")
+        
         # Create Users table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS Users (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL
+                name TEXT UNIQUE NOT NULL COLLATE NOCASE
             )
         ''')
         
@@ -53,7 +169,7 @@ def init_database() -> None:
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS Categories (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL
+                name TEXT UNIQUE NOT NULL COLLATE NOCASE
             )
         ''')
         
@@ -78,37 +194,138 @@ def init_database() -> None:
             'Utilities', 'Healthcare', 'Shopping', 'Other'
         ]
         
-        for category in default_categories:
-            cursor.execute('''
-                INSERT OR IGNORE INTO Categories (name) VALUES (?)
-            ''', (category,))
+        cursor.executemany(
+            'INSERT OR IGNORE INTO Categories (name) VALUES (?)',
+            [(category,) for category in default_categories]
+        )
+        
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'Expenses'")
+        existing_indexes = dict(cursor.fetchall())
+        
+        # Index the columns used by the expense filters. The composite index
+        # leads with date, so it also serves plain date-range lookups. The
+        # user and category indexes also carry the listing's sort order, so
+        # those filters read rows already sorted; they replace the earlier
+        # single-column indexes.
+        for name in ('idx_expenses_user', 'idx_expenses_category'):
+            if name in existing_indexes:
+                cursor.execute(f"DROP INDEX {name}")
+        # An index whose stored definition differs was created by an older
+        # version with other columns, so it is rebuilt
+        new_indexes = False
+        for name, columns in _EXPENSE_INDEXES.items():
+            sql = f"CREATE INDEX {name} ON Expenses ({columns})"
+            if existing_indexes.get(name) != sql:
+                cursor.execute(f"DROP INDEX IF EXISTS {name}")
+                cursor.execute(sql)
+                new_indexes = True
+        
+        # Expenses with their category and user names resolved, for display queries
+        cursor.execute('''
+            CREATE VIEW IF NOT EXISTS ExpensesView AS
+            SELECT e.id, e.date, e.title, e.amount, e.created_at,
+                   c.name AS category_name, u.name AS user_name,
+                   e.category_id, e.user_id
+            FROM Expenses e
+            JOIN Categories c ON c.id = e.category_id
+            JOIN Users u ON u.id = e.user_id
+        ''')
         
         conn.commit()
-        print("Database initialized successfully with default categories.")
+        
+        # Indexes created just now have no planner statistics, so analyze
+        # once so the first queries already use them. Later refreshes are
+        # left to the PRAGMA optimize run at exit, since a full ANALYZE on
+        # every start would rescan every index.
+        if new_indexes:
+            cursor.execute("ANALYZE")
+        logger.info("Database initialized successfully with default categories.")
         
     except sqlite3.Error as e:
-        print(f"Database initialization error: {e}")
+        logger.error("Database initialization failed: %s", e)
         conn.rollback()
         raise
-    finally:
-        close_connection(conn)
 
 
-def check_database_exists() -> bool:
+def _migrate_name_collation(conn: sqlite3.Connection) -> None:
     """
-    Check if the database file exists
+    Rebuild Users and Categories tables whose name column is not COLLATE NOCASE
+    Databases created before the names were case-insensitive compare them
+    with BINARY, so name lookups could neither ignore case nor use the UNIQUE
+    index. Names differing only in case are merged into the row with the
+    lowest id, and the expenses of the merged rows are moved to it.
     
-    Returns:
-        bool: True if database file exists, False otherwise
+    Args:
+        conn: Database connection outside any transaction
     """
-    return os.path.exists('expenses.db')
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'table' "
+        "AND name IN ('Users', 'Categories', 'Expenses')"
+    )
+    tables = dict(cursor.fetchall())
+    outdated = [
+        (table, column) for table, column in (('Users', 'user_id'), ('Categories', 'category_id'))
+        if table in tables and 'COLLATE NOCASE' not in tables[table].upper()
+    ]
+    if not outdated:
+        return
+    
+    # Tables referenced by foreign keys can only be replaced with the checks off,
+    # and the pragma has no effect inside a transaction
+    cursor.execute("PRAGMA foreign_keys = OFF")
+    try:
+        with transaction():
+            # The view would block renaming the rebuilt tables; init_database recreates it
+            cursor.execute("DROP VIEW IF EXISTS ExpensesView")
+            for table, column in outdated:
+                if 'Expenses' in tables:
+                    cursor.execute(f'''
+                        UPDATE Expenses SET {column} = (
+                            SELECT MIN(keep.id) FROM {table} t
+                            JOIN {table} keep ON keep.name = t.name COLLATE NOCASE
+                            WHERE t.id = Expenses.{column}
+                        )
+                        WHERE {column} IN (SELECT id FROM {table})
+                    ''')
+                cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+                sequence = cursor.fetchone()
+                cursor.execute(f'''
+                    CREATE TABLE {table}_nocase (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT UNIQUE NOT NULL COLLATE NOCASE
+                    )
+                ''')
+                cursor.execute(f'''
+                    INSERT INTO {table}_nocase (id, name)
+                    SELECT MIN(id), name FROM {table} GROUP BY name COLLATE NOCASE
+                ''')
+                cursor.execute(f"DROP TABLE {table}")
+                cursor.execute(f"ALTER TABLE {table}_nocase RENAME TO {table}")
+                # Keep AUTOINCREMENT from handing out ids of deleted rows again
+                if sequence is not None:
+                    cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+                                   (sequence[0], table))
+        logger.info("Migrated %s to case-insensitive names.", ', '.join(t for t, _ in outdated))
+    finally:
+        cursor.execute("PRAGMA foreign_keys = ON")
 
 
-def get_current_timestamp() -> str:
+def check_database_exists() -> bool:
     """
-    Get current timestamp in ISO format for created_at fields
+    Check if the database file exists
+    A file: URI in DB_PATH is checked at the path it names; in-memory
+    databases have no file and always report False
     
     Returns:
-        str: Current timestamp in ISO format
+        bool: True if database file exists, False otherwise
     """
-    return datetime.now().isoformat()
+    path = DB_PATH
+    if path.startswith('file:'):
+        uri = urlsplit(path)
+        if parse_qs(uri.query).get('mode') == ['memory']:
+            return False
+        path = unquote(uri.path)
+    if path == ':memory:' or not path:
+        return False
+    return os.path.exists(path)
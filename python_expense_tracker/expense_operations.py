@@ -3,12 +3,22 @@ Core business logic for Expense Tracking System
 Implements all required core functions for expense management
 """
 
-from typing import List, Dict, Optional, Any
-from datetime import datetime
+import logging
+import sqlite3
+from typing import List, Dict, Optional, Any, Mapping, Sequence
+from collections import defaultdict
+from operator import itemgetter
+import database
 import models
 import utils
 
 
+logger = logging.getLogger(__name__)
+
+# Reads the three fields calculate_summary needs from a row in one call
+_SUMMARY_FIELDS = itemgetter('amount', 'user_name', 'category_name')
+
+
 def record_expense(date: str, category: str, title: str, amount: float, user_name: str) -> int:
     """
     Record a new expense with validation and user/category resolution
@@ -25,7 +35,6 @@ def record_expense(date: str, category: str, title: str, amount: float, user_nam
         
     Raises:
         ValueError: If inputs are invalid
-        sqlite3.IntegrityError: If user/category doesn't exist and can't be created
     """
     # Validate inputs
     date = utils.validate_date(date)
@@ -34,47 +43,37 @@ def record_expense(date: str, category: str, title: str, amount: float, user_nam
     user_name = utils.validate_non_empty(user_name, "User name")
     category = utils.validate_non_empty(category, "Category")
     
-    # Get or create user
-    user = models.get_user_by_name(user_name)
-    if not user:
-        try:
-            user_id = models.create_user(user_name)
-            print(f"Created new user: {user_name}")
-        except Exception as e:
-            raise ValueError(f"Failed to create user '{user_name}': {e}")
-    else:
-        user_id = user['id']
-    
-    # Get or create category
-    category_obj = models.get_category_by_name(category)
-    if not category_obj:
-        try:
-            category_id = models.create_category(category)
-            print(f"Created new category: {category}")
-        except Exception as e:
-            raise ValueError(f"Failed to create category '{category}': {e}")
-    else:
-        category_id = category_obj['id']
-    
-    # Insert expense
+    # Resolve (or create) the user and category and insert the expense
+    # in a single transaction
     try:
-        expense_id = models.insert_expense(date, category_id, title, amount, user_id)
-        print(f"Expense recorded successfully with ID: {expense_id}")
+        with database.transaction():
+            user_id, user_created = models.upsert_user(user_name)
+            category_id, category_created = models.upsert_category(category)
+            expense_id = models.insert_expense(date, category_id, title, amount, user_id)
+        
+        # Reported only once the transaction has committed
+        if user_created:
+            logger.info("Created new user: %s", user_name)
+        if category_created:
+            logger.info("Created new category: %s", category)
+        logger.info("Expense recorded successfully with ID: %s", expense_id)
         return expense_id
     except Exception as e:
         raise ValueError(f"Failed to record expense: {e}")
 
 
-def view_expenses_by_date(min_date: Optional[str] = None, max_date: Optional[str] = None) -> List[Dict]:
+def view_expenses_by_date(min_date: Optional[str] = None, max_date: Optional[str] = None) -> List[sqlite3.Row]:
     """
     View expenses filtered by date range
+    Both bounds are inclusive and passed to the query unchanged, so the
+    lookup runs as an index range scan on the date column
     
     Args:
         min_date: Minimum date (YYYY-MM-DD format)
         max_date: Maximum date (YYYY-MM-DD format)
         
     Returns:
-        List[Dict]: List of expense dictionaries
+        List[sqlite3.Row]: Matching expense rows
     """
     try:
         # Validate dates if provided
@@ -90,11 +89,11 @@ def view_expenses_by_date(min_date: Optional[str] = None, max_date: Optional[str
         expenses = models.fetch_expenses_by_filters(min_date=min_date, max_date=max_date)
         return expenses
     except Exception as e:
-        print(f"Error filtering expenses by date: {e}")
+        logger.error("Could not filter expenses by date: %s", e)
         return []
 
 
-def view_expenses_by_amount(min_amount: Optional[float] = None, max_amount: Optional[float] = None) -> List[Dict]:
+def view_expenses_by_amount(min_amount: Optional[float] = None, max_amount: Optional[float] = None) -> List[sqlite3.Row]:
     """
     View expenses filtered by amount range
     
@@ -103,7 +102,7 @@ def view_expenses_by_amount(min_amount: Optional[float] = None, max_amount: Opti
         max_amount: Maximum amount
         
     Returns:
-        List[Dict]: List of expense dictionaries
+        List[sqlite3.Row]: Matching expense rows
     """
     try:
         # Validate amounts if provided
@@ -117,11 +116,11 @@ def view_expenses_by_amount(min_amount: Optional[float] = None, max_amount: Opti
         expenses = models.fetch_expenses_by_filters(min_amount=min_amount, max_amount=max_amount)
         return expenses
     except Exception as e:
-        print(f"Error filtering expenses by amount: {e}")
+        logger.error("Could not filter expenses by amount: %s", e)
         return []
 
 
-def view_expenses_by_category(categories: List[str]) -> List[Dict]:
+def view_expenses_by_category(categories: List[str]) -> List[sqlite3.Row]:
     """
     View expenses filtered by category list
     
@@ -129,41 +128,33 @@ def view_expenses_by_category(categories: List[str]) -> List[Dict]:
         categories: List of category names to filter by
         
     Returns:
-        List[Dict]: List of expense dictionaries
+        List[sqlite3.Row]: Matching expense rows
     """
     try:
         if not categories:
             return []
         
-        # Get category IDs for the provided category names
-        all_categories = models.get_all_categories()
-        category_lookup = {cat['name'].lower(): cat['id'] for cat in all_categories}
+        # Get category IDs for the provided category names (matched case-insensitively)
+        category_matches = models.get_category_ids_by_names(categories)
         
-        category_ids = []
-        invalid_categories = []
-        
-        for category in categories:
-            category_lower = category.lower()
-            if category_lower in category_lookup:
-                category_ids.append(category_lookup[category_lower])
-            else:
-                invalid_categories.append(category)
+        category_ids = [cat_id for cat_id in category_matches.values() if cat_id is not None]
+        invalid_categories = [name for name, cat_id in category_matches.items() if cat_id is None]
         
         if invalid_categories:
-            print(f"Warning: Categories not found: {', '.join(invalid_categories)}")
+            logger.warning("Categories not found: %s", ', '.join(invalid_categories))
         
         if not category_ids:
-            print("No valid categories found.")
+            logger.warning("No valid categories found.")
             return []
         
         expenses = models.fetch_expenses_by_filters(category_ids=category_ids)
         return expenses
     except Exception as e:
-        print(f"Error filtering expenses by category: {e}")
+        logger.error("Could not filter expenses by category: %s", e)
         return []
 
 
-def view_expenses_by_user(user_id: int) -> List[Dict]:
+def view_expenses_by_user(user_id: int) -> List[sqlite3.Row]:
     """
     View expenses filtered by user ID
     
@@ -171,107 +162,140 @@ def view_expenses_by_user(user_id: int) -> List[Dict]:
         user_id: ID of the user to filter by
         
     Returns:
-        List[Dict]: List of expense dictionaries
+        List[sqlite3.Row]: Matching expense rows
     """
     try:
         if user_id <= 0:
             raise ValueError("User ID must be positive")
         
-        expenses = models.fetch_expenses_by_filters(user_id=user_id)
+        expenses = models.fetch_expenses_for_user(user_id)
         return expenses
     except Exception as e:
-        print(f"Error filtering expenses by user: {e}")
+        logger.error("Could not filter expenses by user: %s", e)
         return []
 
 
-def view_all_expenses() -> List[Dict]:
+def view_all_expenses() -> List[sqlite3.Row]:
     """
     View all expenses in the system
     
     Returns:
-        List[Dict]: List of all expense dictionaries
+        List[sqlite3.Row]: All expense rows
     """
     try:
         expenses = models.fetch_expenses_by_filters()
         return expenses
     except Exception as e:
-        print(f"Error retrieving all expenses: {e}")
+        logger.error("Could not retrieve all expenses: %s", e)
         return []
 
 
-def calculate_summary(expenses: Optional[List[Dict]] = None) -> Dict[str, Any]:
+def calculate_summary(expenses: Optional[Sequence[Mapping[str, Any]]] = None) -> Dict[str, Any]:
     """
     Calculate expense summary with totals and breakdowns
     Groups expenses by user with detailed expense lists
     
+    When no list is given the totals are aggregated by SQLite, and the
+    expense rows are only read to build the per-user detail lists.
+    
     Args:
-        expenses: List of expenses to summarize (if None, uses all expenses)
+        expenses: Expense rows to summarize (if None, uses all expenses)
         
     Returns:
         Dict: Summary dictionary with totals, breakdowns, and user expense details
     """
     try:
         if expenses is None:
-            expenses = view_all_expenses()
+            return _summarize_all_expenses()
         
         if not expenses:
-            return {
-                'total': 0.0,
-                'count': 0,
-                'by_category': {},
-                'by_user': {},
-                'user_expenses': {}
-            }
-        
-        # Calculate totals using list comprehensions (Python feature)
-        total = sum(expense['amount'] for expense in expenses)
-        count = len(expenses)
+            return _empty_summary()
         
-        # Calculate by category using dictionary comprehension (Python feature)
-        by_category = {}
-        for expense in expenses:
-            category = expense['category_name']
-            by_category[category] = by_category.get(category, 0) + expense['amount']
-        
-        # Group expenses by user with detailed expense lists (Python feature)
+        # Single pass over the provided expenses
+        total = 0.0
+        by_category = defaultdict(float)
+        by_user = defaultdict(float)
         user_expenses = {}
-        by_user = {}
         
         for expense in expenses:
-            user = expense['user_name']
-            
-            # Add to user total
-            by_user[user] = by_user.get(user, 0) + expense['amount']
+            amount, user, category = _SUMMARY_FIELDS(expense)
+            total += amount
+            by_category[category] += amount
+            by_user[user] += amount
             
             # Group expenses by user for detailed view
-            if user not in user_expenses:
-                user_expenses[user] = []
-            user_expenses[user].append(expense)
+            user_expenses.setdefault(user, []).append(expense)
         
         return {
             'total': total,
-            'count': count,
-            'by_category': by_category,
-            'by_user': by_user,
+            'count': len(expenses),
+            'by_category': dict(by_category),
+            'by_user': dict(by_user),
             'user_expenses': user_expenses
         }
     except Exception as e:
-        print(f"Error calculating summary: {e}")
-        return {
-            'total': 0.0,
-            'count': 0,
-            'by_category': {},
-            'by_user': {},
-            'user_expenses': {}
-        }
+        logger.error("Could not calculate summary: %s", e)
+        return _empty_summary()
+
+
+def _empty_summary() -> Dict[str, Any]:
+    """Return the summary shape used when there are no expenses"""
+    return {
+        'total': 0.0,
+        'count': 0,
+        'by_category': {},
+        'by_user': {},
+        'user_expenses': {}
+    }
 
 
-def get_expenses_by_date_range() -> List[Dict]:
+def _summarize_all_expenses() -> Dict[str, Any]:
+    """
+    Summarize every stored expense with SQL aggregation
+    Both reads run in one transaction, so the totals and the detail lists
+    come from the same snapshot
+    
+    Returns:
+        Dict: Summary dictionary in the same shape as calculate_summary
+    """
+    with database.transaction():
+        summary = models.summarize()
+        if not summary['count']:
+            return _empty_summary()
+        
+        # The per-user tables still need the individual rows
+        user_expenses = {}
+        for expense in models.iter_expenses_by_filters():
+            user_expenses.setdefault(expense['user_name'], []).append(expense)
+    
+    summary['user_expenses'] = user_expenses
+    return summary
+
+
+def calculate_summary_streaming(**filters: Any) -> Dict[str, Any]:
+    """
+    Calculate expense totals without loading the expense rows into Python
+    Accepts the same filters as models.fetch_expenses_by_filters and lets
+    models.summarize aggregate them in one query, so 'user_expenses' is left empty
+    
+    Returns:
+        Dict: Summary dictionary with totals and breakdowns
+    """
+    try:
+        summary = _empty_summary()
+        summary.update(models.summarize(**filters))
+        return summary
+    except Exception as e:
+        logger.error("Could not calculate summary: %s", e)
+        return _empty_summary()
+
+
+def get_expenses_by_date_range() -> List[sqlite3.Row]:
     """
     Interactive function to get expenses by date range with user input
     
     Returns:
-        List[Dict]: Filtered expenses
+        List[sqlite3.Row]: Filtered expense rows
     """
     print("\n=== Filter Expenses by Date Range ===")
     min_date, max_date = utils.get_date_range_input()
@@ -283,12 +307,12 @@ def get_expenses_by_date_range() -> List[Dict]:
     return view_expenses_by_date(min_date, max_date)
 
 
-def get_expenses_by_amount_range() -> List[Dict]:
+def get_expenses_by_amount_range() -> List[sqlite3.Row]:
     """
     Interactive function to get expenses by amount range with user input
     
     Returns:
-        List[Dict]: Filtered expenses
+        List[sqlite3.Row]: Filtered expense rows
     """
     print("\n=== Filter Expenses by Amount Range ===")
     min_amount, max_amount = utils.get_amount_range_input()
@@ -300,12 +324,12 @@ def get_expenses_by_amount_range() -> List[Dict]:
     return view_expenses_by_amount(min_amount, max_amount)
 
 
-def get_expenses_by_category_interactive() -> List[Dict]:
+def get_expenses_by_category_interactive() -> List[sqlite3.Row]:
     """
     Interactive function to get expenses by category with user input
     
     Returns:
-        List[Dict]: Filtered expenses
+        List[sqlite3.Row]: Filtered expense rows
     """
     print("\n=== Filter Expenses by Category ===")
     
@@ -319,26 +343,30 @@ def get_expenses_by_category_interactive() -> List[Dict]:
     for i, cat in enumerate(categories, 1):
         print(f"{i}. {cat['name']}")
     
-    # Get user selection
+    # Get user selection (the set answers "already selected?", the list keeps input order)
     selected_categories = []
+    selected_set = set()
     while True:
         try:
             choice = input("\nEnter category number (or 'done' to finish): ").strip()
             if choice.lower() == 'done':
                 break
             
+            if not choice.isdecimal():
+                print("Please enter a valid number or 'done'")
+                continue
+            
             choice_num = int(choice)
             if 1 <= choice_num <= len(categories):
                 selected_cat = categories[choice_num - 1]['name']
-                if selected_cat not in selected_categories:
+                if selected_cat not in selected_set:
+                    selected_set.add(selected_cat)
                     selected_categories.append(selected_cat)
                     print(f"Added category: {selected_cat}")
                 else:
                     print(f"Category {selected_cat} already selected")
             else:
                 print(f"Please enter a number between 1 and {len(categories)}")
-        except ValueError:
-            print("Please enter a valid number or 'done'")
         except KeyboardInterrupt:
             print("\nOperation cancelled.")
             return []
@@ -350,12 +378,12 @@ def get_expenses_by_category_interactive() -> List[Dict]:
     return view_expenses_by_category(selected_categories)
 
 
-def get_expenses_by_user_interactive() -> List[Dict]:
+def get_expenses_by_user_interactive() -> List[sqlite3.Row]:
     """
     Interactive function to get expenses by user with user input
     
     Returns:
-        List[Dict]: Filtered expenses
+        List[sqlite3.Row]: Filtered expense rows
     """
     print("\n=== Filter Expenses by User ===")
     
@@ -3,6 +3,7 @@ Main application entry point for Expense Tracking System
 Interactive CLI menu system for expense management
 """
 
+import logging
 import sys
 from typing import List, Dict
 import database
@@ -176,6 +177,7 @@ def manage_users() -> None:
         options = ["View All Users", "Add New User", "Back to Main Menu"]
         utils.display_menu(options, "User Management")
         choice = utils.get_menu_choice(3)
+        models.revalidate_caches()
         
         if choice == 0:
             return
@@ -217,6 +219,7 @@ def manage_categories() -> None:
         options = ["View All Categories", "Add New Category", "Back to Main Menu"]
         utils.display_menu(options, "Category Management")
         choice = utils.get_menu_choice(3)
+        models.revalidate_caches()
         
         if choice == 0:
             return
@@ -250,8 +253,24 @@ def manage_categories() -> None:
             break
 
 
+class CliLogFormatter(logging.Formatter):
+    """Show informational messages as plain output and label warnings and errors"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        if record.levelno >= logging.WARNING:
+            return f"{record.levelname.capitalize()}: {message}"
+        return message
+
+
 def main() -> None:
     """Main application loop"""
+    # Library modules report through logging; show those messages like regular
+    # output, with a "Warning:"/"Error:" label where the level matters
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(CliLogFormatter('%(message)s'))
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+    
     print("Welcome to the Expense Tracking System!")
     print("Initializing database...")
     
@@ -269,6 +288,8 @@ def main() -> None:
         try:
             display_main_menu()
             choice = utils.get_menu_choice(9)
+            # Another CLI may have written the database since the last action
+            models.revalidate_caches()
             
             if choice == 0:
                 print("\nThank you for using the Expense Tracking System!")
@@ -3,9 +3,122 @@ Data access layer for Expense Tracking System
 Handles CRUD operations for Users, Categories, and Expenses
 """
 
+import json
 import sqlite3
-from typing import List, Dict, Optional, Tuple
-from database import get_connection, close_connection, get_current_timestamp
+import string
+import threading
+from itertools import chain
+from typing import Iterator, List, Dict, Optional, Tuple
+from database import get_connection, on_rollback, transaction
+
+
+# Users and categories change rarely but are listed on every interactive menu,
+# so get_all_users()/get_all_categories() keep their last result, and
+# get_user_by_name()/get_category_by_name() remember the rows they found
+# (misses are not stored, so newly created names are found without
+# invalidation). The caches belong to the calling thread's connection and
+# live in this thread-local next to it:
+#   conn                         connection the caches were filled from
+#   users, categories            cached lists; None marks them dirty
+#   users_by_name, categories_by_name
+#                                found (id, name) rows keyed by _name_key(name)
+#   data_version                 PRAGMA data_version when last checked
+# Writes through this module mark the lists dirty and rolled-back
+# transactions clear everything, so serving a hit costs no database round
+# trip. Commits made by other processes are picked up by revalidate_caches().
+_caches = threading.local()
+
+_SQL_DATA_VERSION = 'PRAGMA data_version'
+
+
+# SQLite's NOCASE folds only the ASCII letters, so the name caches fold the
+# same way; str.casefold() would also merge names SQLite keeps apart
+_NOCASE_FOLD = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _name_key(name: str) -> str:
+    """Return the name cache key under which NOCASE-equal names coincide"""
+    return name.translate(_NOCASE_FOLD)
+
+
+def _cache_state() -> threading.local:
+    """Return the calling thread's caches, emptied if its connection changed"""
+    conn = get_connection()
+    if getattr(_caches, 'conn', None) is not conn:
+        _caches.conn = conn
+        _caches.data_version = conn.execute(_SQL_DATA_VERSION).fetchone()[0]
+        _empty_caches()
+    return _caches
+
+
+def _empty_caches() -> None:
+    """Drop every cached lookup of the calling thread"""
+    _caches.users = None
+    _caches.categories = None
+    _caches.users_by_name = {}
+    _caches.categories_by_name = {}
+
+
+def clear_caches() -> None:
+    """Drop cached lookups so they are rebuilt from the current database"""
+    _caches.conn = None
+    _empty_caches()
+
+
+on_rollback(clear_caches)
+
+
+def revalidate_caches() -> None:
+    """
+    Drop the caches if another connection has committed since the last check
+    WAL lets several CLIs share the database file, so the CLI calls this once
+    per menu action; PRAGMA data_version changes whenever another connection
+    commits, and reading it is far cheaper than re-reading the tables
+    """
+    state = _cache_state()
+    version = state.conn.execute(_SQL_DATA_VERSION).fetchone()[0]
+    if version != state.data_version:
+        _empty_caches()
+        state.data_version = version
+
+
+# Fixed statements are kept as module constants so every call sends the exact
+# same SQL text and hits the connection's prepared-statement cache.
+# The name columns are COLLATE NOCASE (init_database migrates older tables),
+# so plain comparisons and the UNIQUE constraint ignore case and use its index.
+_SQL_INSERT_USER = 'INSERT INTO Users (name) VALUES (?) ON CONFLICT (name) DO NOTHING RETURNING id'
+_SQL_ALL_USERS = 'SELECT id, name FROM Users ORDER BY name'
+_SQL_USER_BY_NAME = 'SELECT id, name FROM Users WHERE name = ?'
+_SQL_USER_BY_ID = 'SELECT id, name FROM Users WHERE id = ?'
+
+_SQL_INSERT_CATEGORY = 'INSERT INTO Categories (name) VALUES (?) ON CONFLICT (name) DO NOTHING RETURNING id'
+_SQL_ALL_CATEGORIES = 'SELECT id, name FROM Categories ORDER BY name'
+_SQL_CATEGORY_BY_NAME = 'SELECT id, name FROM Categories WHERE name = ?'
+_SQL_CATEGORY_IDS_BY_NAMES = '''
+    SELECT r.value, c.id
+    FROM json_each(?) r
+    LEFT JOIN Categories c ON c.name = r.value
+'''
+
+# created_at is stamped by SQLite rather than formatted in Python, in the
+# statement itself so the schema and existing database files stay unchanged
+_SQL_INSERT_EXPENSE = '''
+    INSERT INTO Expenses (date, category_id, title, amount, created_at, user_id)
+    VALUES (?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'), ?)
+'''
+_SQL_BULK_INSERT_EXPENSES = '''
+    INSERT INTO Expenses (date, category_id, title, amount, created_at, user_id) VALUES
+'''
+_SQL_EXPENSE_VALUES_ROW = "(?, ?, ?, ?, ?, ?)"
+_SQL_NOW = "SELECT strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+_SQL_EXPENSES_FOR_USER = '''
+    SELECT e.id, e.date, e.title, e.amount, e.created_at,
+           c.name AS category_name, ? AS user_name
+    FROM Expenses e
+    JOIN Categories c ON e.category_id = c.id
+    WHERE e.user_id = ?
+    ORDER BY e.date DESC, e.created_at DESC, e.id DESC
+'''
 
 
 def create_user(name: str) -> int:
@@ -28,54 +141,113 @@ def create_user(name: str) -> int:
     conn = get_connection()
     cursor = conn.cursor()
     
-    try:
-        cursor.execute('INSERT INTO Users (name) VALUES (?)', (name.strip(),))
-        user_id = cursor.lastrowid
-        conn.commit()
-        return user_id
-    except sqlite3.IntegrityError:
+    # A name that already exists in any case returns no row instead of raising
+    with transaction():
+        row = cursor.execute(_SQL_INSERT_USER, (name.strip(),)).fetchone()
+    
+    if row is None:
         raise sqlite3.IntegrityError(f"User '{name}' already exists")
-    finally:
-        close_connection(conn)
+    _mark_users_dirty()
+    return row[0]
 
 
-def get_all_users() -> List[Dict[str, int]]:
+def upsert_user(name: str) -> Tuple[int, bool]:
     """
-    Retrieve all users from the database
+    Get the ID of a user, creating the user if the name is new
+    Names match ignoring case, so 'alice' resolves to an existing 'Alice'
     
+    Args:
+        name: User's name
+        
     Returns:
-        List[Dict]: List of user dictionaries with id and name
+        Tuple[int, bool]: User ID of the existing or created user, and
+        whether it was created
+        
+    Raises:
+        ValueError: If name is empty or invalid
     """
+    if not name or not name.strip():
+        raise ValueError("User name cannot be empty")
+    
     conn = get_connection()
     cursor = conn.cursor()
     
-    try:
-        cursor.execute('SELECT id, name FROM Users ORDER BY name')
-        users = [{'id': row[0], 'name': row[1]} for row in cursor.fetchall()]
-        return users
-    finally:
-        close_connection(conn)
+    # Insert the name if it is new, otherwise read the existing row
+    with transaction():
+        row = cursor.execute(_SQL_INSERT_USER, (name.strip(),)).fetchone()
+        created = row is not None
+        if not created:
+            row = cursor.execute(_SQL_USER_BY_NAME, (name.strip(),)).fetchone()
+        user_id = row[0]
+    
+    if created:
+        _mark_users_dirty()
+    return user_id, created
+
+
+def get_all_users() -> List[sqlite3.Row]:
+    """
+    Retrieve all users from the database
+    The list is cached until a user is added
+    
+    Returns:
+        List[sqlite3.Row]: User rows with id and name
+    """
+    state = _cache_state()
+    if state.users is None:
+        cursor = state.conn.cursor()
+        
+        cursor.execute(_SQL_ALL_USERS)
+        state.users = cursor.fetchall()
+    return list(state.users)
+
+
+def _mark_users_dirty() -> None:
+    """Make the next get_all_users() call re-read the Users table"""
+    _cache_state().users = None
 
 
 def get_user_by_name(name: str) -> Optional[Dict[str, int]]:
     """
     Get user by name
+    Found users are remembered, so repeated lookups of a name in any case skip the query
     
     Args:
         name: User's name to search for
         
+    Returns:
+        Optional[Dict]: User dictionary if found, None otherwise
+    """
+    state = _cache_state()
+    key = _name_key(name)
+    row = state.users_by_name.get(key)
+    if row is None:
+        cursor = state.conn.cursor()
+        
+        cursor.execute(_SQL_USER_BY_NAME, (name,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        row = state.users_by_name[key] = (row[0], row[1])
+    return {'id': row[0], 'name': row[1]}
+
+
+def get_user_by_id(user_id: int) -> Optional[Dict[str, int]]:
+    """
+    Get user by ID
+    
+    Args:
+        user_id: User ID to search for
+        
     Returns:
         Optional[Dict]: User dictionary if found, None otherwise
     """
     conn = get_connection()
     cursor = conn.cursor()
     
-    try:
-        cursor.execute('SELECT id, name FROM Users WHERE name = ?', (name,))
-        row = cursor.fetchone()
-        return {'id': row[0], 'name': row[1]} if row else None
-    finally:
-        close_connection(conn)
+    cursor.execute(_SQL_USER_BY_ID, (user_id,))
+    row = cursor.fetchone()
+    return {'id': row[0], 'name': row[1]} if row else None
 
 
 def create_category(name: str) -> int:
@@ -98,38 +270,96 @@ def create_category(name: str) -> int:
     conn = get_connection()
     cursor = conn.cursor()
     
-    try:
-        cursor.execute('INSERT INTO Categories (name) VALUES (?)', (name.strip(),))
-        category_id = cursor.lastrowid
-        conn.commit()
-        return category_id
-    except sqlite3.IntegrityError:
+    # A name that already exists in any case returns no row instead of raising
+    with transaction():
+        row = cursor.execute(_SQL_INSERT_CATEGORY, (name.strip(),)).fetchone()
+    
+    if row is None:
         raise sqlite3.IntegrityError(f"Category '{name}' already exists")
-    finally:
-        close_connection(conn)
+    _mark_categories_dirty()
+    return row[0]
 
 
-def get_all_categories() -> List[Dict[str, int]]:
+def upsert_category(name: str) -> Tuple[int, bool]:
+    """
+    Get the ID of a category, creating the category if the name is new
+    Names match ignoring case, so 'food' resolves to an existing 'Food'
+    
+    Args:
+        name: Category name
+        
+    Returns:
+        Tuple[int, bool]: Category ID of the existing or created category, and
+        whether it was created
+        
+    Raises:
+        ValueError: If name is empty or invalid
+    """
+    if not name or not name.strip():
+        raise ValueError("Category name cannot be empty")
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    # Insert the name if it is new, otherwise read the existing row
+    with transaction():
+        row = cursor.execute(_SQL_INSERT_CATEGORY, (name.strip(),)).fetchone()
+        created = row is not None
+        if not created:
+            row = cursor.execute(_SQL_CATEGORY_BY_NAME, (name.strip(),)).fetchone()
+        category_id = row[0]
+    
+    if created:
+        _mark_categories_dirty()
+    return category_id, created
+
+
+def get_all_categories() -> List[sqlite3.Row]:
     """
     Retrieve all categories from the database
+    The list is cached until a category is added
+    
+    Returns:
+        List[sqlite3.Row]: Category rows with id and name
+    """
+    state = _cache_state()
+    if state.categories is None:
+        cursor = state.conn.cursor()
+        
+        cursor.execute(_SQL_ALL_CATEGORIES)
+        state.categories = cursor.fetchall()
+    return list(state.categories)
+
+
+def _mark_categories_dirty() -> None:
+    """Make the next get_all_categories() call re-read the Categories table"""
+    _cache_state().categories = None
+
+
+def get_category_ids_by_names(names: List[str]) -> Dict[str, Optional[int]]:
+    """
+    Resolve category names to IDs in one query, ignoring case
     
+    Args:
+        names: Category names to look up
+        
     Returns:
-        List[Dict]: List of category dictionaries with id and name
+        Dict[str, Optional[int]]: Category ID for each requested name, None if not found
     """
+    if not names:
+        return {}
+    
     conn = get_connection()
     cursor = conn.cursor()
     
-    try:
-        cursor.execute('SELECT id, name FROM Categories ORDER BY name')
-        categories = [{'id': row[0], 'name': row[1]} for row in cursor.fetchall()]
-        return categories
-    finally:
-        close_connection(conn)
+    cursor.execute(_SQL_CATEGORY_IDS_BY_NAMES, (json.dumps(names),))
+    return dict(cursor.fetchall())
 
 
 def get_category_by_name(name: str) -> Optional[Dict[str, int]]:
     """
     Get category by name
+    Found categories are remembered, so repeated lookups of a name in any case skip the query
     
     Args:
         name: Category name to search for
@@ -137,15 +367,18 @@ def get_category_by_name(name: str) -> Optional[Dict[str, int]]:
     Returns:
         Optional[Dict]: Category dictionary if found, None otherwise
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute('SELECT id, name FROM Categories WHERE name = ?', (name,))
+    state = _cache_state()
+    key = _name_key(name)
+    row = state.categories_by_name.get(key)
+    if row is None:
+        cursor = state.conn.cursor()
+        
+        cursor.execute(_SQL_CATEGORY_BY_NAME, (name,))
         row = cursor.fetchone()
-        return {'id': row[0], 'name': row[1]} if row else None
-    finally:
-        close_connection(conn)
+        if row is None:
+            return None
+        row = state.categories_by_name[key] = (row[0], row[1])
+    return {'id': row[0], 'name': row[1]}
 
 
 def insert_expense(date: str, category_id: int, title: str, amount: float, user_id: int) -> int:
@@ -166,31 +399,98 @@ def insert_expense(date: str, category_id: int, title: str, amount: float, user_
         sqlite3.IntegrityError: If foreign key constraints are violated
         ValueError: If required fields are empty or invalid
     """
-    if not title or not title.strip():
+    _check_expense_fields(date, title, amount)
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        with transaction():
+            cursor.execute(
+                _SQL_INSERT_EXPENSE,
+                (date, category_id, title.strip(), amount, user_id)
+            )
+        
+        return cursor.lastrowid
+    except sqlite3.IntegrityError as e:
+        if "FOREIGN KEY constraint failed" in str(e):
+            raise sqlite3.IntegrityError("Invalid category_id or user_id")
+        raise
+
+
+def _check_expense_fields(date: str, title: str, amount: float) -> None:
+    """
+    Reject obviously bad expense values before any database work
+    The date check is only a shape test; full validation is utils.validate_date
+    
+    Raises:
+        ValueError: If the date is not shaped like YYYY-MM-DD, the title is empty
+        or the amount is not positive
+    """
+    if not isinstance(date, str) or len(date) != 10 or date[4] != '-' or date[7] != '-':
+        raise ValueError("Expense date must be in YYYY-MM-DD format")
+    
+    if not isinstance(title, str) or not title.strip():
         raise ValueError("Expense title cannot be empty")
     
     if amount <= 0:
         raise ValueError("Expense amount must be positive")
+
+
+def bulk_insert_expenses(
+    rows: List[Tuple[str, int, str, float, int]],
+    chunk_size: int = 100,
+    created_at: Optional[str] = None
+) -> int:
+    """
+    Insert many expense records in a single transaction
+    Rows are sent as multi-row INSERT ... VALUES statements of up to
+    chunk_size rows each, so SQLite runs one statement per chunk. The whole
+    batch shares one created_at timestamp.
+    
+    Args:
+        rows: (date, category_id, title, amount, user_id) tuples, in insert_expense's argument order
+        chunk_size: Rows per INSERT statement (6 parameters each, keep under SQLite's 999 limit)
+        created_at: Timestamp to record on every row; defaults to the current local
+            time in the same ISO format insert_expense uses
+        
+    Returns:
+        int: Number of expenses inserted
+        
+    Raises:
+        sqlite3.IntegrityError: If foreign key constraints are violated (nothing is inserted)
+        ValueError: If chunk_size is below 1, or any row has a malformed date,
+            an empty title or a non-positive amount
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    
+    for date, _, title, amount, _ in rows:
+        _check_expense_fields(date, title, amount)
     
     conn = get_connection()
     cursor = conn.cursor()
     
+    if created_at is None:
+        created_at = cursor.execute(_SQL_NOW).fetchone()[0]
+    
+    params = [
+        (date, category_id, title.strip(), amount, created_at, user_id)
+        for date, category_id, title, amount, user_id in rows
+    ]
+    
     try:
-        created_at = get_current_timestamp()
-        cursor.execute('''
-            INSERT INTO Expenses (date, category_id, title, amount, created_at, user_id)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (date, category_id, title.strip(), amount, created_at, user_id))
-        
-        expense_id = cursor.lastrowid
-        conn.commit()
-        return expense_id
+        with transaction():
+            for start in range(0, len(params), chunk_size):
+                chunk = params[start:start + chunk_size]
+                values = ','.join([_SQL_EXPENSE_VALUES_ROW] * len(chunk))
+                cursor.execute(_SQL_BULK_INSERT_EXPENSES + values,
+                               list(chain.from_iterable(chunk)))
+        return len(params)
     except sqlite3.IntegrityError as e:
         if "FOREIGN KEY constraint failed" in str(e):
             raise sqlite3.IntegrityError("Invalid category_id or user_id")
         raise
-    finally:
-        close_connection(conn)
 
 
 def fetch_expenses_by_filters(
@@ -199,8 +499,9 @@ def fetch_expenses_by_filters(
     min_amount: Optional[float] = None,
     max_amount: Optional[float] = None,
     category_ids: Optional[List[int]] = None,
-    user_id: Optional[int] = None
-) -> List[Dict]:
+    user_id: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[sqlite3.Row]:
     """
     Generic function to fetch expenses with optional filters
     
@@ -211,76 +512,275 @@ def fetch_expenses_by_filters(
         max_amount: Maximum amount filter
         category_ids: List of category IDs to filter by
         user_id: User ID to filter by
+        limit: Maximum number of rows to return (newest first), None for all
+        
+    Returns:
+        List[sqlite3.Row]: Expense rows with all fields, readable by column name
+    """
+    return _query_expenses(
+        min_date, max_date, min_amount, max_amount, category_ids, user_id, limit
+    ).fetchall()
+
+
+def iter_expenses_by_filters(
+    min_date: Optional[str] = None,
+    max_date: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    category_ids: Optional[List[int]] = None,
+    user_id: Optional[int] = None
+) -> Iterator[sqlite3.Row]:
+    """
+    Stream expenses matching the optional filters one row at a time
+    Takes the same filters as fetch_expenses_by_filters but reads rows
+    straight from the cursor instead of materializing the whole result
+    
+    Yields:
+        sqlite3.Row: Expense row with all fields
+    """
+    yield from _query_expenses(
+        min_date, max_date, min_amount, max_amount, category_ids, user_id
+    )
+
+
+def fetch_expenses_page(
+    cursor_key: Optional[Tuple[str, str, int]] = None,
+    limit: int = 500,
+    min_date: Optional[str] = None,
+    max_date: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    category_ids: Optional[List[int]] = None,
+    user_id: Optional[int] = None
+) -> List[sqlite3.Row]:
+    """
+    Fetch one page of filtered expenses using keyset pagination
+    Pages continue from the last row seen rather than an OFFSET, so each
+    page is an index seek and memory stays bounded by the page size
+    
+    Args:
+        cursor_key: (date, created_at, id) of the last row of the previous page,
+            None for the first page
+        limit: Maximum number of rows per page
+        min_date: Minimum date filter (YYYY-MM-DD)
+        max_date: Maximum date filter (YYYY-MM-DD)
+        min_amount: Minimum amount filter
+        max_amount: Maximum amount filter
+        category_ids: List of category IDs to filter by
+        user_id: User ID to filter by
         
     Returns:
-        List[Dict]: List of expense dictionaries with all fields
+        List[sqlite3.Row]: Up to limit expense rows, newest first; empty after the last page
     """
     conn = get_connection()
     cursor = conn.cursor()
     
-    try:
-        # Build the base query with joins
-        query = '''
-            SELECT e.id, e.date, e.title, e.amount, e.created_at,
-                   c.name as category_name, u.name as user_name
-            FROM Expenses e
-            JOIN Categories c ON e.category_id = c.id
-            JOIN Users u ON e.user_id = u.id
+    where, params = _build_expense_filters(
+        min_date, max_date, min_amount, max_amount, category_ids, user_id
+    )
+    
+    if cursor_key is not None:
+        params.extend(cursor_key)
+    params.append(limit)
+    
+    key = (where, cursor_key is not None)
+    query = _PAGE_SQL.get(key)
+    if query is None:
+        if cursor_key is not None:
+            where += " AND " if where else "WHERE "
+            where += "(date, created_at, id) < (?, ?, ?)"
+        # id breaks ties between rows stamped in the same millisecond
+        query = f'''
+            SELECT id, date, title, amount, created_at, category_name, user_name
+            FROM ExpensesView
+            {where}
+            ORDER BY date DESC, created_at DESC, id DESC
+            LIMIT ?
         '''
+        _PAGE_SQL[key] = query
+    
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+def _query_expenses(
+    min_date: Optional[str],
+    max_date: Optional[str],
+    min_amount: Optional[float],
+    max_amount: Optional[float],
+    category_ids: Optional[List[int]],
+    user_id: Optional[int],
+    limit: Optional[int] = None
+) -> sqlite3.Cursor:
+    """Run the filtered expense query and return the cursor positioned on its rows"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    where, params = _build_expense_filters(
+        min_date, max_date, min_amount, max_amount, category_ids, user_id
+    )
+    
+    # With a LIMIT, SQLite keeps only the top rows instead of sorting them all
+    if limit is not None:
+        params.append(limit)
+    
+    key = (where, limit is not None)
+    query = _LISTING_SQL.get(key)
+    if query is None:
+        # ExpensesView already joins in the category and user names
+        query = f'''
+            SELECT id, date, title, amount, created_at, category_name, user_name
+            FROM ExpensesView
+            {where}
+            ORDER BY date DESC, created_at DESC, id DESC
+            {"LIMIT ?" if limit is not None else ""}
+        '''
+        _LISTING_SQL[key] = query
+    
+    return cursor.execute(query, params)
+
+
+# Filter conditions in the order _build_expense_filters binds them. Dates are
+# ISO strings, so comparing the bare column sorts correctly and keeps the date
+# index usable; never wrap date in DATE()/strftime(). Several category IDs are
+# bound as one JSON array so the SQL text does not change with their number;
+# a single one is compared directly, so its rows come off the category index
+# already sorted.
+_FILTER_CONDITIONS = (
+    "date >= ?",
+    "date <= ?",
+    "amount >= ?",
+    "amount <= ?",
+    "category_id IN (SELECT value FROM json_each(?))",
+    "category_id = ?",
+    "user_id = ?",
+)
+
+# SQL text built so far, keyed by which filters are set, so each of the 96
+# possible filter shapes is assembled once and then reused
+_WHERE_CLAUSES: Dict[int, str] = {}
+_LISTING_SQL: Dict[Tuple[str, bool], str] = {}
+_PAGE_SQL: Dict[Tuple[str, bool], str] = {}
+
+
+def _build_expense_filters(
+    min_date: Optional[str],
+    max_date: Optional[str],
+    min_amount: Optional[float],
+    max_amount: Optional[float],
+    category_ids: Optional[List[int]],
+    user_id: Optional[int]
+) -> Tuple[str, List]:
+    """
+    Build the WHERE clause shared by the expense listing and summary queries
+    The column names exist on both Expenses and ExpensesView
+    
+    Returns:
+        Tuple[str, List]: WHERE clause (empty when no filter is set) and its parameters
+    """
+    values = (
+        min_date or None,
+        max_date or None,
+        min_amount,
+        max_amount,
+        json.dumps(category_ids) if category_ids and len(category_ids) > 1 else None,
+        category_ids[0] if category_ids and len(category_ids) == 1 else None,
+        user_id,
+    )
+    
+    mask = 0
+    params = []
+    for bit, value in enumerate(values):
+        if value is not None:
+            mask |= 1 << bit
+            params.append(value)
+    
+    where = _WHERE_CLAUSES.get(mask)
+    if where is None:
+        conditions = [cond for bit, cond in enumerate(_FILTER_CONDITIONS) if mask & (1 << bit)]
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        _WHERE_CLAUSES[mask] = where
+    return where, params
+
+
+def fetch_expenses_for_user(user_id: int) -> List[sqlite3.Row]:
+    """
+    Fetch all expenses of one user
+    The user's name is read once and bound into the query, so it only has
+    to join Categories
+    
+    Args:
+        user_id: User ID to filter by
         
-        # Build WHERE clause conditions
-        conditions = []
-        params = []
-        
-        if min_date:
-            conditions.append("e.date >= ?")
-            params.append(min_date)
-        
-        if max_date:
-            conditions.append("e.date <= ?")
-            params.append(max_date)
-        
-        if min_amount is not None:
-            conditions.append("e.amount >= ?")
-            params.append(min_amount)
-        
-        if max_amount is not None:
-            conditions.append("e.amount <= ?")
-            params.append(max_amount)
-        
-        if category_ids:
-            placeholders = ','.join(['?'] * len(category_ids))
-            conditions.append(f"e.category_id IN ({placeholders})")
-            params.extend(category_ids)
-        
-        if user_id is not None:
-            conditions.append("e.user_id = ?")
-            params.append(user_id)
-        
-        # Add WHERE clause if conditions exist
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-        
-        # Add ORDER BY clause
-        query += " ORDER BY e.date DESC, e.created_at DESC"
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        
-        # Convert to list of dictionaries
-        expenses = []
-        for row in rows:
-            expense = {
-                'id': row[0],
-                'date': row[1],
-                'title': row[2],
-                'amount': row[3],
-                'created_at': row[4],
-                'category_name': row[5],
-                'user_name': row[6]
-            }
-            expenses.append(expense)
+    Returns:
+        List[sqlite3.Row]: Expense rows shaped like fetch_expenses_by_filters rows,
+        empty if the user does not exist
+    """
+    user = get_user_by_id(user_id)
+    if user is None:
+        return []
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(_SQL_EXPENSES_FOR_USER, (user['name'], user_id))
+    return cursor.fetchall()
+
+
+def summarize(
+    min_date: Optional[str] = None,
+    max_date: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    category_ids: Optional[List[int]] = None,
+    user_id: Optional[int] = None
+) -> Dict:
+    """
+    Aggregate the expenses matching the optional filters in a single query
+    The filtered rows are read once and grouped by category, by user and
+    overall inside SQLite
+    
+    Args:
+        min_date: Minimum date filter (YYYY-MM-DD)
+        max_date: Maximum date filter (YYYY-MM-DD)
+        min_amount: Minimum amount filter
+        max_amount: Maximum amount filter
+        category_ids: List of category IDs to filter by
+        user_id: User ID to filter by
         
-        return expenses
-    finally:
-        close_connection(conn)
+    Returns:
+        Dict: 'total' and 'count' of the matching expenses, plus 'by_category'
+        and 'by_user' mapping names to total amounts
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    where, params = _build_expense_filters(
+        min_date, max_date, min_amount, max_amount, category_ids, user_id
+    )
+    
+    # SQLite has no GROUPING SETS, so the three groupings are UNIONed over
+    # one materialized scan of the filtered rows
+    cursor.execute(f'''
+        WITH filtered AS MATERIALIZED (
+            SELECT category_id, user_id, amount FROM Expenses {where}
+        )
+        SELECT 'category', c.name, SUM(f.amount), COUNT(*)
+        FROM filtered f JOIN Categories c ON c.id = f.category_id
+        GROUP BY f.category_id
+        UNION ALL
+        SELECT 'user', u.name, SUM(f.amount), COUNT(*)
+        FROM filtered f JOIN Users u ON u.id = f.user_id
+        GROUP BY f.user_id
+        UNION ALL
+        SELECT 'total', NULL, COALESCE(SUM(amount), 0.0), COUNT(*) FROM filtered
+    ''', params)
+    
+    summary = {'total': 0.0, 'count': 0, 'by_category': {}, 'by_user': {}}
+    for grouping, name, amount, count in cursor.fetchall():
+        if grouping == 'total':
+            summary['total'] = amount
+            summary['count'] = count
+        else:
+            summary['by_' + grouping][name] = amount
+    return summary
@@ -7,122 +7,183 @@ import pytest
 import os
 import sys
 import sqlite3
-import tempfile
-from datetime import datetime
+import uuid
 
 # Add parent directory to path to import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# Never let a test fall back to the real expenses.db, even without temp_db
+os.environ['EXPENSE_DB_PATH'] = 'file:expense_tests_default?mode=memory&cache=shared'
+
 import database
 import models
 
 
+# The cached connection session_db built the schema on; temp_db reuses it
+# while it is still the cached one, so PRAGMA setup runs once
+_session_conn = None
+# The seeded categories, read on that connection before any test ran
+_seed_categories = None
+
+
+@pytest.fixture(scope="session")
+def session_db():
+    """
+    Create the in-memory test database once per test session
+    
+    Yields:
+        str: URI of the session database
+    """
+    global _session_conn, _seed_categories
+    # A uniquely named shared-cache memory database: no disk I/O, and every
+    # connection opened on the URI sees the same data. Memory databases are
+    # private to the process, so pytest-xdist workers each get their own.
+    db_path = f'file:expense_test_{uuid.uuid4().hex}?mode=memory&cache=shared'
+    
+    # The database lives as long as one connection to it is open
+    keeper = sqlite3.connect(db_path, uri=True)
+    try:
+        # Build the schema with the application's own init_database, on a
+        # fresh cached connection that temp_db then keeps using
+        database.close_connection(getattr(database._tls, 'conn', None))
+        default_path = database.DB_PATH
+        database.DB_PATH = db_path
+        try:
+            database.init_database()
+        finally:
+            database.DB_PATH = default_path
+        _session_conn = database.get_connection()
+        _seed_categories = _session_conn.execute(models._SQL_ALL_CATEGORIES).fetchall()
+        
+        yield db_path
+    finally:
+        database.close_connection(_session_conn)
+        keeper.close()
+
+
+@pytest.fixture(scope="session")
+def default_categories(session_db):
+    """
+    Load the seeded default categories once per test session
+    Tests roll back their writes, so these rows and ids stay valid for every
+    test; use models.get_all_categories() in tests that add categories
+    
+    Args:
+        session_db: Session database fixture
+        
+    Returns:
+        list: Category rows with id and name, ordered by name
+    """
+    return _seed_categories
+
+
 @pytest.fixture
-def temp_db(monkeypatch):
+def temp_db(session_db, monkeypatch):
     """
-    Create a temporary test database that is deleted after the test
+    Run the test inside a transaction on the session database and roll it back afterwards
+    Writes made through models join this transaction as savepoints, so every
+    test starts from the schema and seed data init_database built once for the
+    session. The cached connection is kept open for the next test.
     
     Yields:
-        str: Path to temporary database file
+        str: URI of the test database
     """
-    # Create a temporary file
-    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    global _session_conn
+    monkeypatch.setattr(database, 'DB_PATH', session_db)
+    models.clear_caches()
     
-    def temp_get_connection():
-        conn = sqlite3.connect(db_path)
-        conn.execute("PRAGMA foreign_keys = ON")
-        return conn
+    # Reopen only if a test closed the session connection or cached another one
+    conn = getattr(database._tls, 'conn', None)
+    if conn is None or conn is not _session_conn:
+        database.close_connection(conn)
+        conn = _session_conn = database.get_connection()
+    conn.execute("BEGIN")
     
-    # Patch both database and models modules
-    monkeypatch.setattr(database, 'get_connection', temp_get_connection)
-    monkeypatch.setattr('models.get_connection', temp_get_connection)
+    yield session_db
     
-    # Initialize the database tables manually
-    conn = temp_get_connection()
-    cursor = conn.cursor()
+    # Cleanup: discard everything the test wrote (a test that closed the
+    # connection itself has already discarded it)
+    if getattr(database._tls, 'conn', None) is conn:
+        conn.rollback()
+    models.clear_caches()
+
+
+@pytest.fixture
+def file_db(tmp_path, monkeypatch):
+    """
+    Point the application at a new, empty database file
+    Nothing wraps the test in a transaction, so writes really commit and
+    transaction() takes its top-level BEGIN/COMMIT path
     
-    try:
-        # Create Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL
-            )
-        ''')
-        
-        # Create Categories table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL
-            )
-        ''')
-        
-        # Create Expenses table with foreign key constraints
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                category_id INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                amount REAL NOT NULL,
-                created_at TEXT NOT NULL,
-                user_id INTEGER NOT NULL,
-                FOREIGN KEY (category_id) REFERENCES Categories (id),
-                FOREIGN KEY (user_id) REFERENCES Users (id)
-            )
-        ''')
-        
-        # Insert default categories
-        default_categories = [
-            'Food', 'Transportation', 'Entertainment', 
-            'Utilities', 'Healthcare', 'Shopping', 'Other'
-        ]
-        
-        for category in default_categories:
-            cursor.execute('''
-                INSERT OR IGNORE INTO Categories (name) VALUES (?)
-            ''', (category,))
+    Yields:
+        str: Path of the database file; call init_database() for the schema
+    """
+    database.close_connection(getattr(database._tls, 'conn', None))
+    db_file = str(tmp_path / 'expenses.db')
+    monkeypatch.setattr(database, 'DB_PATH', db_file)
+    models.clear_caches()
+    
+    yield db_file
+    
+    database.close_connection(getattr(database._tls, 'conn', None))
+    models.clear_caches()
+
+
+@pytest.fixture
+def sql_trace(temp_db):
+    """
+    Record every SQL statement the cached connection runs during the test
+    Bound values appear inlined in the recorded text
+    
+    Args:
+        temp_db: Temporary database fixture
         
-        conn.commit()
-    finally:
-        conn.close()
+    Yields:
+        list: Statements in the order they ran
+    """
+    conn = database.get_connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
     
-    yield db_path
+    yield statements
     
-    # Cleanup: remove temp file (monkeypatch will auto-restore)
-    os.close(db_fd)
-    os.unlink(db_path)
+    # A test that closed the connection has already dropped the callback
+    if getattr(database._tls, 'conn', None) is conn:
+        conn.set_trace_callback(None)
+
+
+@pytest.fixture
+def query_plan(temp_db):
+    """
+    Provide a helper that returns SQLite's query plan for a statement
+    
+    Args:
+        temp_db: Temporary database fixture
+        
+    Returns:
+        Callable: Takes the SQL and optional parameters and returns the plan
+        steps as text, one entry per EXPLAIN QUERY PLAN row
+    """
+    def explain(sql, params=()):
+        conn = database.get_connection()
+        return [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+    return explain
 
 
 @pytest.fixture
 def clean_db(temp_db):
     """
     Provide a clean database for each test
-    Clears all data except default categories
+    Holds only the default categories; temp_db rolls back everything the
+    test wrote, so no cleanup is needed
     
     Args:
         temp_db: Temporary database fixture
         
     Yields:
-        str: Path to clean database
+        str: URI of the clean database
     """
-    # Just yield the temp_db - it's already initialized and clean
     yield temp_db
-    
-    # Cleanup after test (optional)
-    conn = database.get_connection()
-    cursor = conn.cursor()
-    
-    try:
-        # Clear all expenses and users after test
-        cursor.execute('DELETE FROM Expenses')
-        cursor.execute('DELETE FROM Users')
-        conn.commit()
-    except:
-        pass  # Ignore errors during cleanup
-    finally:
-        database.close_connection(conn)
 
 
 @pytest.fixture
@@ -141,19 +202,19 @@ def sample_user(clean_db):
 
 
 @pytest.fixture
-def sample_category(clean_db):
+def sample_category(clean_db, default_categories):
     """
     Create a sample category for testing
     
     Args:
         clean_db: Clean database fixture
+        default_categories: Default categories fixture
         
     Returns:
         dict: Category dictionary with id and name
     """
     # Use existing default category
-    categories = models.get_all_categories()
-    return categories[0] if categories else None
+    return default_categories[0] if default_categories else None
 
 
 @pytest.fixture
@@ -178,12 +239,12 @@ def sample_expense(clean_db, sample_user, sample_category):
     )
     
     # Fetch and return the complete expense
-    expenses = models.fetch_expenses_by_filters()
+    expenses = models.fetch_expenses_by_filters(limit=1)
     return expenses[0] if expenses else None
 
 
 @pytest.fixture
-def multiple_expenses(clean_db, sample_user, sample_category):
+def multiple_expenses(clean_db, sample_user, sample_category, default_categories):
     """
     Create multiple expenses for testing
     
@@ -191,6 +252,7 @@ def multiple_expenses(clean_db, sample_user, sample_category):
         clean_db: Clean database fixture
         sample_user: Sample user fixture
         sample_category: Sample category fixture
+        default_categories: Default categories fixture
         
     Returns:
         list: List of expense dictionaries
@@ -199,7 +261,7 @@ def multiple_expenses(clean_db, sample_user, sample_category):
     user2_id = models.create_user("TestUser2")
     
     # Get another category
-    categories = models.get_all_categories()
+    categories = default_categories
     category2 = categories[1] if len(categories) > 1 else categories[0]
     
     # Create multiple expenses
@@ -211,33 +273,7 @@ def multiple_expenses(clean_db, sample_user, sample_category):
         ('2025-10-24', sample_category['id'], 'Groceries', 100.00, sample_user['id']),
     ]
     
-    for date, cat_id, title, amount, user_id in expenses_data:
-        models.insert_expense(date, cat_id, title, amount, user_id)
+    models.bulk_insert_expenses(expenses_data)
     
     # Fetch and return all expenses
     return models.fetch_expenses_by_filters()
-
-
-@pytest.fixture
-def mock_datetime(monkeypatch):
-    """
-    Mock datetime for consistent testing
-    
-    Args:
-        monkeypatch: Pytest monkeypatch fixture
-        
-    Returns:
-        datetime: Fixed datetime object
-    """
-    class MockDateTime:
-        @staticmethod
-        def now():
-            return datetime(2025, 10, 25, 12, 0, 0)
-        
-        @staticmethod
-        def isoformat():
-            return '2025-10-25T12:00:00'
-    
-    monkeypatch.setattr(database, 'datetime', MockDateTime)
-    return MockDateTime
-
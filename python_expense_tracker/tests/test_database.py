@@ -4,11 +4,13 @@ Tests database initialization, connection management, and utility functions
 """
 
 import pytest
-import sqlite3
 import os
-from datetime import datetime
+import sqlite3
+import subprocess
+import sys
 
 import database
+import models
 
 
 def test_init_database_creates_tables(temp_db):
@@ -49,6 +51,61 @@ def test_init_database_creates_default_categories(temp_db):
         database.close_connection(conn)
 
 
+def test_init_database_on_new_file(tmp_path, monkeypatch):
+    """Test that init_database builds the schema in a fresh database file"""
+    database.close_connection(getattr(database._tls, 'conn', None))
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'expenses.db'))
+    
+    try:
+        database.init_database()
+        conn = database.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM sqlite_stat1")
+        assert cursor.fetchone()[0] > 0, "New indexes should be analyzed once"
+        cursor.execute("DELETE FROM sqlite_stat1")
+        conn.commit()
+        
+        # Running it again must leave the existing data untouched
+        database.init_database()
+        cursor.execute("SELECT COUNT(*) FROM sqlite_stat1")
+        assert cursor.fetchone()[0] == 0, "Existing indexes should not be analyzed again"
+        
+        cursor.execute("SELECT COUNT(*) FROM Categories")
+        assert cursor.fetchone()[0] == 7, "Default categories should be seeded once"
+        
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='Expenses'")
+        indexes = {row[0] for row in cursor.fetchall()}
+        assert {'idx_expenses_user_date', 'idx_expenses_cat_date',
+                'idx_expenses_date_user_cat'} <= indexes, "Filter indexes should exist"
+        
+        # Indexes replaced by the composite ones are dropped once, then left alone
+        cursor.execute("CREATE INDEX idx_expenses_user ON Expenses (user_id)")
+        conn.commit()
+        traced = []
+        conn.set_trace_callback(traced.append)
+        database.init_database()
+        database.init_database()
+        conn.set_trace_callback(None)
+        assert [sql for sql in traced if sql.startswith('DROP INDEX')] == ['DROP INDEX idx_expenses_user']
+        
+        # An index left with an older definition is rebuilt
+        cursor.execute("DROP INDEX idx_expenses_user_date")
+        cursor.execute("CREATE INDEX idx_expenses_user_date ON Expenses (user_id, date DESC, created_at DESC)")
+        conn.commit()
+        database.init_database()
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'idx_expenses_user_date'")
+        assert cursor.fetchone()[0].endswith('created_at DESC, id DESC)'), "Outdated index should be rebuilt"
+        
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='view' AND name='ExpensesView'")
+        assert cursor.fetchone()[0] == 1, "ExpensesView should exist"
+        
+        cursor.execute("PRAGMA journal_mode")
+        assert cursor.fetchone()[0] == 'wal', "Database should use WAL journaling"
+        assert not conn.in_transaction, "Initialization should be committed"
+    finally:
+        database.close_connection(getattr(database._tls, 'conn', None))
+
+
 def test_get_connection_returns_valid_connection(temp_db):
     """Test that get_connection returns a valid SQLite connection"""
     conn = database.get_connection()
@@ -79,6 +136,19 @@ def test_get_connection_enables_foreign_keys(temp_db):
         database.close_connection(conn)
 
 
+def test_get_connection_reuses_cached_connection(temp_db):
+    """Test that repeated get_connection calls return the same connection"""
+    conn = database.get_connection()
+    
+    assert database.get_connection() is conn, "Connection should be reused"
+    
+    # Closing the cached connection makes the next call open a new one
+    database.close_connection(conn)
+    new_conn = database.get_connection()
+    assert new_conn is not conn, "Closed connection should not be reused"
+    database.close_connection(new_conn)
+
+
 def test_close_connection(temp_db):
     """Test that close_connection properly closes the connection"""
     conn = database.get_connection()
@@ -90,51 +160,137 @@ def test_close_connection(temp_db):
         cursor.execute("SELECT 1")
 
 
-def test_close_connection_with_none():
-    """Test that close_connection handles None gracefully"""
-    # Should not raise any error
-    database.close_connection(None)
+def test_exit_hook_optimizes_and_closes_cached_connection(temp_db, sql_trace):
+    """Test the atexit hook runs PRAGMA optimize and clears the cached connection"""
+    conn = database.get_connection()
+    
+    database._close_cached_connection()
+    
+    # optimize may go on to analyze tables the session has queried
+    assert sql_trace[0] == "PRAGMA optimize", "Should optimize before closing"
+    assert database._tls.conn is None, "Cached connection should be cleared"
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
 
 
-def test_get_current_timestamp_format():
-    """Test that get_current_timestamp returns ISO format"""
-    timestamp = database.get_current_timestamp()
+def test_exit_hook_collects_missing_statistics(tmp_path, monkeypatch):
+    """Test PRAGMA optimize at exit analyzes queried tables that have no statistics"""
+    db_file = str(tmp_path / 'expenses.db')
+    database.close_connection(getattr(database._tls, 'conn', None))
+    monkeypatch.setattr(database, 'DB_PATH', db_file)
+    models.clear_caches()
     
-    # Check it's a string
-    assert isinstance(timestamp, str), "Timestamp should be a string"
+    try:
+        database.init_database()
+        with database.transaction() as conn:
+            conn.execute("DELETE FROM sqlite_stat1")
+        user_id = models.create_user("Stats")
+        models.bulk_insert_expenses(
+            [('2025-10-25', 1, f'Expense {i}', 1.0, user_id) for i in range(50)]
+        )
+        models.fetch_expenses_by_filters(user_id=user_id)
+        database._close_cached_connection()
+        
+        conn = sqlite3.connect(db_file)
+        try:
+            analyzed = {row[0] for row in conn.execute("SELECT tbl FROM sqlite_stat1")}
+        finally:
+            conn.close()
+        assert 'Expenses' in analyzed, "Queried tables should get planner statistics"
+    finally:
+        database.close_connection(getattr(database._tls, 'conn', None))
+        models.clear_caches()
+
+
+def test_nested_transaction_rolls_back_only_inner_block(temp_db):
+    """Test a failing nested block undoes its own writes but not the outer ones"""
+    conn = database.get_connection()
+    conn.rollback()  # start outside the fixture's transaction
     
-    # Check it can be parsed as ISO format
     try:
-        dt = datetime.fromisoformat(timestamp)
-        assert isinstance(dt, datetime), "Should be valid ISO format"
-    except ValueError:
-        pytest.fail("Timestamp should be in ISO format")
+        with database.transaction():
+            conn.execute("INSERT INTO Users (name) VALUES ('Outer')")
+            with pytest.raises(RuntimeError):
+                with database.transaction():
+                    conn.execute("INSERT INTO Users (name) VALUES ('Inner')")
+                    raise RuntimeError("fail inner block")
+        
+        names = [row[0] for row in conn.execute("SELECT name FROM Users")]
+        assert names == ['Outer'], "Only the outer write should be committed"
+        assert not conn.in_transaction, "Outer block should commit"
+    finally:
+        with database.transaction():
+            conn.execute("DELETE FROM Users")
 
 
-def test_check_database_exists_true(temp_db):
-    """Test check_database_exists returns True when database exists"""
-    # The temp_db fixture creates a database file
-    # But check_database_exists checks for 'expenses.db'
-    # So we need to create that file temporarily
+def test_db_path_from_environment(tmp_path):
+    """Test EXPENSE_DB_PATH selects the database when the module is imported"""
+    db_file = str(tmp_path / 'other.db')
+    env = dict(os.environ, EXPENSE_DB_PATH=db_file)
+    module_dir = os.path.dirname(os.path.abspath(database.__file__))
     
-    # Create a temporary expenses.db file
-    with open('expenses.db', 'w') as f:
-        f.write('')
+    result = subprocess.run(
+        [sys.executable, '-c', 'import database; print(database.DB_PATH)'],
+        cwd=module_dir, env=env, capture_output=True, text=True, check=True
+    )
     
+    assert result.stdout.strip() == db_file
+
+
+def test_session_schema_matches_init_database(temp_db, tmp_path):
+    """Test the shared test database has exactly the schema init_database builds"""
+    db_file = str(tmp_path / 'fresh.db')
+    env = dict(os.environ, EXPENSE_DB_PATH=db_file)
+    module_dir = os.path.dirname(os.path.abspath(database.__file__))
+    subprocess.run(
+        [sys.executable, '-c', 'import database; database.init_database()'],
+        cwd=module_dir, env=env, capture_output=True, text=True, check=True
+    )
+    
+    schema_sql = "SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%' ORDER BY name"
+    fresh = sqlite3.connect(db_file)
     try:
-        result = database.check_database_exists()
-        assert result is True, "Should return True when database exists"
+        expected = fresh.execute(schema_sql).fetchall()
     finally:
-        # Clean up
-        if os.path.exists('expenses.db'):
-            os.remove('expenses.db')
+        fresh.close()
+    
+    assert [tuple(row) for row in database.get_connection().execute(schema_sql)] == expected
 
 
-def test_check_database_exists_false():
+def test_close_connection_with_none():
+    """Test that close_connection handles None gracefully"""
+    # Should not raise any error
+    database.close_connection(None)
+
+
+def test_check_database_exists_true(tmp_path, monkeypatch):
+    """Test check_database_exists returns True when database exists"""
+    db_file = tmp_path / 'expenses.db'
+    db_file.write_text('')
+    monkeypatch.setattr(database, 'DB_PATH', str(db_file))
+    
+    result = database.check_database_exists()
+    assert result is True, "Should return True when database exists"
+
+
+def test_check_database_exists_file_uri(tmp_path, monkeypatch):
+    """Test check_database_exists resolves file: URIs to the file they name"""
+    db_file = tmp_path / 'expenses.db'
+    db_file.write_text('')
+    
+    monkeypatch.setattr(database, 'DB_PATH', f'file:{db_file}?mode=rwc')
+    assert database.check_database_exists() is True
+    
+    monkeypatch.setattr(database, 'DB_PATH', f'file:{tmp_path / "missing.db"}')
+    assert database.check_database_exists() is False
+    
+    monkeypatch.setattr(database, 'DB_PATH', 'file:expenses_mem?mode=memory&cache=shared')
+    assert database.check_database_exists() is False, "In-memory databases have no file"
+
+
+def test_check_database_exists_false(tmp_path, monkeypatch):
     """Test check_database_exists returns False when database doesn't exist"""
-    # Make sure expenses.db doesn't exist
-    if os.path.exists('expenses.db'):
-        os.remove('expenses.db')
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'expenses.db'))
     
     result = database.check_database_exists()
     assert result is False, "Should return False when database doesn't exist"
@@ -187,6 +343,9 @@ def test_database_schema_expenses_table(temp_db):
         assert 'amount' in columns, "Expenses table should have amount column"
         assert 'created_at' in columns, "Expenses table should have created_at column"
         assert 'user_id' in columns, "Expenses table should have user_id column"
+        
+        cursor.execute("SELECT dflt_value FROM pragma_table_info('Expenses') WHERE name = 'created_at'")
+        assert cursor.fetchone()[0] is None, "created_at should be set by the INSERT, not a DEFAULT"
     finally:
         database.close_connection(conn)
 
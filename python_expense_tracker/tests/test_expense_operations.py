@@ -4,9 +4,12 @@ Tests core functions for recording, viewing, and summarizing expenses
 """
 
 import pytest
+import logging
+import sqlite3
 from io import StringIO
 import sys
 
+import database
 import expense_operations
 import models
 
@@ -15,8 +18,9 @@ import models
 # RECORD EXPENSE TESTS
 # ============================================================================
 
-def test_record_expense_success(clean_db, sample_user, sample_category):
+def test_record_expense_success(clean_db, sample_user, sample_category, caplog):
     """Test recording an expense successfully"""
+    caplog.set_level(logging.INFO)
     expense_id = expense_operations.record_expense(
         date='2025-10-25',
         category=sample_category['name'],
@@ -31,10 +35,12 @@ def test_record_expense_success(clean_db, sample_user, sample_category):
     expenses = models.fetch_expenses_by_filters()
     assert len(expenses) == 1, "Should have one expense"
     assert expenses[0]['title'] == 'Test Expense'
+    assert "Created new" not in caplog.text, "Existing user and category should not be reported"
 
 
-def test_record_expense_creates_new_user(clean_db, sample_category):
+def test_record_expense_creates_new_user(clean_db, sample_category, caplog):
     """Test recording expense auto-creates new user"""
+    caplog.set_level(logging.INFO)
     expense_id = expense_operations.record_expense(
         date='2025-10-25',
         category=sample_category['name'],
@@ -49,10 +55,12 @@ def test_record_expense_creates_new_user(clean_db, sample_category):
     user = models.get_user_by_name('NewUser')
     assert user is not None, "Should create new user"
     assert user['name'] == 'NewUser'
+    assert "Created new user: NewUser" in caplog.text, "Should report the new user"
 
 
-def test_record_expense_creates_new_category(clean_db, sample_user):
+def test_record_expense_creates_new_category(clean_db, sample_user, caplog):
     """Test recording expense auto-creates new category"""
+    caplog.set_level(logging.INFO)
     expense_id = expense_operations.record_expense(
         date='2025-10-25',
         category='NewCategory',
@@ -67,6 +75,50 @@ def test_record_expense_creates_new_category(clean_db, sample_user):
     category = models.get_category_by_name('NewCategory')
     assert category is not None, "Should create new category"
     assert category['name'] == 'NewCategory'
+    assert "Created new category: NewCategory" in caplog.text, "Should report the new category"
+
+
+def test_record_expense_rolls_back_on_failure(clean_db, sample_category, monkeypatch):
+    """Test a failed insert does not leave an auto-created user behind"""
+    def failing_insert(*args, **kwargs):
+        raise RuntimeError("insert failed")
+    
+    monkeypatch.setattr(models, 'insert_expense', failing_insert)
+    
+    with pytest.raises(ValueError):
+        expense_operations.record_expense(
+            date='2025-10-25',
+            category=sample_category['name'],
+            title='Test Expense',
+            amount=50.00,
+            user_name='RolledBackUser'
+        )
+    
+    assert models.get_user_by_name('RolledBackUser') is None, "User creation should be rolled back"
+
+
+def test_record_expense_commits_and_rolls_back_on_file(file_db, monkeypatch):
+    """Test record_expense really commits, and rolls back a failure, outside any test transaction"""
+    database.init_database()
+    
+    expense_id = expense_operations.record_expense('2025-10-25', 'Food', 'Lunch', 12.50, 'FileUser')
+    
+    def failing_insert(*args, **kwargs):
+        raise RuntimeError("insert failed")
+    
+    monkeypatch.setattr(models, 'insert_expense', failing_insert)
+    with pytest.raises(ValueError):
+        expense_operations.record_expense('2025-10-26', 'Travel', 'Taxi', 30.00, 'RolledBackUser')
+    
+    assert not database.get_connection().in_transaction, "Both calls should end their transaction"
+    # A second connection only sees committed data
+    other = sqlite3.connect(file_db)
+    try:
+        assert other.execute("SELECT id FROM Expenses").fetchall() == [(expense_id,)]
+        assert other.execute("SELECT name FROM Users").fetchall() == [('FileUser',)]
+        assert other.execute("SELECT COUNT(*) FROM Categories WHERE name = 'Travel'").fetchone()[0] == 0
+    finally:
+        other.close()
 
 
 def test_record_expense_invalid_date_raises_error(clean_db, sample_user, sample_category):
@@ -157,6 +209,14 @@ def test_view_expenses_by_date_invalid_range_raises_error(clean_db):
     assert expenses == []
 
 
+def test_view_expenses_by_date_invalid_range_skips_query(clean_db, mocker):
+    """Test an inverted date range is rejected before any query runs"""
+    fetch = mocker.patch.object(models, 'fetch_expenses_by_filters')
+    
+    assert expense_operations.view_expenses_by_date('2025-10-25', '2025-10-20') == []
+    fetch.assert_not_called()
+
+
 def test_view_expenses_by_amount_range(clean_db, multiple_expenses):
     """Test viewing expenses filtered by amount range"""
     expenses = expense_operations.view_expenses_by_amount(
@@ -177,6 +237,15 @@ def test_view_expenses_by_amount_negative_raises_error(clean_db):
     assert expenses == []
 
 
+def test_view_expenses_by_amount_invalid_range_skips_query(clean_db, mocker):
+    """Test negative or inverted amount bounds are rejected before any query runs"""
+    fetch = mocker.patch.object(models, 'fetch_expenses_by_filters')
+    
+    assert expense_operations.view_expenses_by_amount(min_amount=-10.00) == []
+    assert expense_operations.view_expenses_by_amount(min_amount=60.00, max_amount=30.00) == []
+    fetch.assert_not_called()
+
+
 def test_view_expenses_by_category_single(clean_db, multiple_expenses, sample_category):
     """Test viewing expenses filtered by single category"""
     expenses = expense_operations.view_expenses_by_category([sample_category['name']])
@@ -186,9 +255,9 @@ def test_view_expenses_by_category_single(clean_db, multiple_expenses, sample_ca
         assert expense['category_name'] == sample_category['name']
 
 
-def test_view_expenses_by_category_multiple(clean_db, multiple_expenses):
+def test_view_expenses_by_category_multiple(clean_db, multiple_expenses, default_categories):
     """Test viewing expenses filtered by multiple categories"""
-    categories = models.get_all_categories()
+    categories = default_categories
     category_names = [cat['name'] for cat in categories[:2]]
     
     expenses = expense_operations.view_expenses_by_category(category_names)
@@ -196,11 +265,12 @@ def test_view_expenses_by_category_multiple(clean_db, multiple_expenses):
     assert len(expenses) >= 1, "Should return expenses for specified categories"
 
 
-def test_view_expenses_by_category_invalid_category(clean_db, multiple_expenses):
+def test_view_expenses_by_category_invalid_category(clean_db, multiple_expenses, caplog):
     """Test viewing expenses with invalid category name"""
     expenses = expense_operations.view_expenses_by_category(['NonexistentCategory'])
     
     assert expenses == [], "Should return empty list for invalid category"
+    assert "Categories not found: NonexistentCategory" in caplog.text, "Should log a warning"
 
 
 def test_view_expenses_by_user_valid(clean_db, multiple_expenses, sample_user):
@@ -310,6 +380,43 @@ def test_calculate_summary_with_specific_expenses(clean_db, multiple_expenses):
     assert 'TestUser' in summary['by_user']
 
 
+def test_calculate_summary_all_matches_list_summary(clean_db, multiple_expenses):
+    """Test summarizing all expenses matches summarizing the same rows as a list"""
+    from_list = expense_operations.calculate_summary(models.fetch_expenses_by_filters())
+    
+    assert expense_operations.calculate_summary() == from_list, "Both paths should share one loop"
+
+
+def test_calculate_summary_all_aggregates_in_sql(clean_db, multiple_expenses, sql_trace):
+    """Test the all-expenses summary takes its totals from SQLite inside one savepoint"""
+    sql_trace.clear()
+    expense_operations.calculate_summary()
+    
+    assert any('WITH filtered AS MATERIALIZED' in sql for sql in sql_trace), "Totals should come from summarize"
+    assert sql_trace[0] == 'SAVEPOINT nested', "Both reads should share one transaction"
+    assert sql_trace[-1] == 'RELEASE nested'
+
+
+def test_calculate_summary_streaming_matches_summary(clean_db, multiple_expenses):
+    """Test streaming summary totals match the regular summary"""
+    streamed = expense_operations.calculate_summary_streaming()
+    summary = expense_operations.calculate_summary()
+    
+    assert streamed['count'] == summary['count']
+    assert abs(streamed['total'] - summary['total']) < 0.01
+    assert streamed['by_category'] == summary['by_category']
+    assert streamed['by_user'] == summary['by_user']
+    assert streamed['user_expenses'] == {}, "Streaming summary should not keep rows"
+
+
+def test_calculate_summary_streaming_with_filters(clean_db, multiple_expenses, sample_user):
+    """Test streaming summary applies the given filters"""
+    streamed = expense_operations.calculate_summary_streaming(user_id=sample_user['id'])
+    
+    assert streamed['count'] == 3, "Should only count the user's expenses"
+    assert list(streamed['by_user']) == [sample_user['name']]
+
+
 # ============================================================================
 # INTERACTIVE FUNCTION TESTS (with mocking)
 # ============================================================================
@@ -347,6 +454,21 @@ def test_get_expenses_by_category_interactive_with_selection(clean_db, multiple_
     assert len(expenses) >= 1, "Should return expenses for selected category"
 
 
+def test_get_expenses_by_category_interactive_skips_bad_and_repeated_input(clean_db, multiple_expenses,
+                                                                          monkeypatch, capsys):
+    """Test invalid and repeated choices are reported without ending the selection"""
+    inputs = iter(['abc', '99', '1', '1', 'done'])
+    monkeypatch.setattr('builtins.input', lambda _: next(inputs))
+    
+    expenses = expense_operations.get_expenses_by_category_interactive()
+    output = capsys.readouterr().out
+    
+    assert "Please enter a valid number or 'done'" in output
+    assert "Please enter a number between 1 and" in output
+    assert "already selected" in output
+    assert len(expenses) == 3, "Should return expenses for the selected category"
+
+
 def test_get_expenses_by_user_interactive_with_selection(clean_db, multiple_expenses, monkeypatch):
     """Test interactive user selection"""
     # Mock user input: select user 1
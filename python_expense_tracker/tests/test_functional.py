@@ -46,20 +46,22 @@ def test_user_can_record_expense(clean_db):
     assert recorded_expense['date'] == date
 
 
-def test_user_can_view_expenses_by_date(clean_db):
+def test_user_can_view_expenses_by_date(clean_db, default_categories):
     """
     User Story: As a user, I want to view expenses within a date range
     so that I can see my spending for a specific period
     """
     # Given: Multiple expenses exist across different dates
     user_id = models.create_user("Bob")
-    categories = models.get_all_categories()
+    categories = default_categories
     category_id = categories[0]['id']
     
-    models.insert_expense('2025-10-20', category_id, 'Expense 1', 100.00, user_id)
-    models.insert_expense('2025-10-22', category_id, 'Expense 2', 50.00, user_id)
-    models.insert_expense('2025-10-24', category_id, 'Expense 3', 75.00, user_id)
-    models.insert_expense('2025-10-26', category_id, 'Expense 4', 25.00, user_id)
+    models.bulk_insert_expenses([
+        ('2025-10-20', category_id, 'Expense 1', 100.00, user_id),
+        ('2025-10-22', category_id, 'Expense 2', 50.00, user_id),
+        ('2025-10-24', category_id, 'Expense 3', 75.00, user_id),
+        ('2025-10-26', category_id, 'Expense 4', 25.00, user_id),
+    ])
     
     # When: The user filters expenses by date range
     filtered_expenses = expense_operations.view_expenses_by_date(
@@ -75,7 +77,7 @@ def test_user_can_view_expenses_by_date(clean_db):
             "All expenses should be within date range"
 
 
-def test_user_can_view_summary(clean_db):
+def test_user_can_view_summary(clean_db, default_categories):
     """
     User Story: As a user, I want to view a summary of my expenses
     so that I can understand my spending patterns
@@ -84,17 +86,21 @@ def test_user_can_view_summary(clean_db):
     user1_id = models.create_user("Charlie")
     user2_id = models.create_user("Diana")
     
-    categories = models.get_all_categories()
+    categories = default_categories
     food_cat = categories[0]
     transport_cat = categories[1]
     
     # Charlie's expenses
-    models.insert_expense('2025-10-25', food_cat['id'], 'Groceries', 100.00, user1_id)
-    models.insert_expense('2025-10-25', transport_cat['id'], 'Gas', 50.00, user1_id)
+    models.bulk_insert_expenses([
+        ('2025-10-25', food_cat['id'], 'Groceries', 100.00, user1_id),
+        ('2025-10-25', transport_cat['id'], 'Gas', 50.00, user1_id),
+    ])
     
     # Diana's expenses
-    models.insert_expense('2025-10-25', food_cat['id'], 'Restaurant', 75.00, user2_id)
-    models.insert_expense('2025-10-25', transport_cat['id'], 'Uber', 25.00, user2_id)
+    models.bulk_insert_expenses([
+        ('2025-10-25', food_cat['id'], 'Restaurant', 75.00, user2_id),
+        ('2025-10-25', transport_cat['id'], 'Uber', 25.00, user2_id),
+    ])
     
     # When: The user requests an expense summary
     summary = expense_operations.calculate_summary()
@@ -178,14 +184,14 @@ def test_user_can_manage_users(clean_db):
     assert emma['name'] == "Emma"
 
 
-def test_expense_validation_prevents_invalid_data(clean_db):
+def test_expense_validation_prevents_invalid_data(clean_db, default_categories):
     """
     User Story: As a system, I want to validate expense data
     so that only valid expenses are recorded
     """
     # Given: A user attempts to record expenses with invalid data
     user_id = models.create_user("Validator")
-    categories = models.get_all_categories()
+    categories = default_categories
     category_id = categories[0]['id']
     
     # When/Then: Invalid date format should be rejected
@@ -243,21 +249,23 @@ def test_expense_validation_prevents_invalid_data(clean_db):
     assert len(expenses) == 0, "No invalid expenses should be recorded"
 
 
-def test_user_can_filter_by_amount_range(clean_db):
+def test_user_can_filter_by_amount_range(clean_db, default_categories):
     """
     User Story: As a user, I want to filter expenses by amount
     so that I can find large or small expenses
     """
     # Given: Multiple expenses with different amounts exist
     user_id = models.create_user("Henry")
-    categories = models.get_all_categories()
+    categories = default_categories
     category_id = categories[0]['id']
     
-    models.insert_expense('2025-10-25', category_id, 'Small 1', 5.00, user_id)
-    models.insert_expense('2025-10-25', category_id, 'Medium 1', 50.00, user_id)
-    models.insert_expense('2025-10-25', category_id, 'Large 1', 500.00, user_id)
-    models.insert_expense('2025-10-25', category_id, 'Medium 2', 75.00, user_id)
-    models.insert_expense('2025-10-25', category_id, 'Small 2', 10.00, user_id)
+    models.bulk_insert_expenses([
+        ('2025-10-25', category_id, 'Small 1', 5.00, user_id),
+        ('2025-10-25', category_id, 'Medium 1', 50.00, user_id),
+        ('2025-10-25', category_id, 'Large 1', 500.00, user_id),
+        ('2025-10-25', category_id, 'Medium 2', 75.00, user_id),
+        ('2025-10-25', category_id, 'Small 2', 10.00, user_id),
+    ])
     
     # When: The user filters by amount range
     medium_expenses = expense_operations.view_expenses_by_amount(
@@ -273,24 +281,26 @@ def test_user_can_filter_by_amount_range(clean_db):
             "All expenses should be within amount range"
 
 
-def test_user_can_filter_by_category(clean_db):
+def test_user_can_filter_by_category(clean_db, default_categories):
     """
     User Story: As a user, I want to filter expenses by category
     so that I can see spending in specific areas
     """
     # Given: Expenses exist in multiple categories
     user_id = models.create_user("Iris")
-    categories = models.get_all_categories()
+    categories = default_categories
     
     cat1 = categories[0]
     cat2 = categories[1]
     cat3 = categories[2]
     
-    models.insert_expense('2025-10-25', cat1['id'], 'Cat1 Exp1', 100.00, user_id)
-    models.insert_expense('2025-10-25', cat2['id'], 'Cat2 Exp1', 50.00, user_id)
-    models.insert_expense('2025-10-25', cat1['id'], 'Cat1 Exp2', 75.00, user_id)
-    models.insert_expense('2025-10-25', cat3['id'], 'Cat3 Exp1', 25.00, user_id)
-    models.insert_expense('2025-10-25', cat2['id'], 'Cat2 Exp2', 60.00, user_id)
+    models.bulk_insert_expenses([
+        ('2025-10-25', cat1['id'], 'Cat1 Exp1', 100.00, user_id),
+        ('2025-10-25', cat2['id'], 'Cat2 Exp1', 50.00, user_id),
+        ('2025-10-25', cat1['id'], 'Cat1 Exp2', 75.00, user_id),
+        ('2025-10-25', cat3['id'], 'Cat3 Exp1', 25.00, user_id),
+        ('2025-10-25', cat2['id'], 'Cat2 Exp2', 60.00, user_id),
+    ])
     
     # When: The user filters by a specific category
     cat1_expenses = expense_operations.view_expenses_by_category([cat1['name']])
@@ -309,25 +319,29 @@ def test_user_can_filter_by_category(clean_db):
     assert len(multi_cat_expenses) == 4, "Should return 4 expenses from both categories"
 
 
-def test_user_can_track_expenses_over_time(clean_db):
+def test_user_can_track_expenses_over_time(clean_db, default_categories):
     """
     User Story: As a user, I want to track expenses over time
     so that I can see spending trends
     """
     # Given: Expenses are recorded over multiple months
     user_id = models.create_user("Jack")
-    categories = models.get_all_categories()
+    categories = default_categories
     category_id = categories[0]['id']
     
     # October expenses
-    models.insert_expense('2025-10-05', category_id, 'Oct Week 1', 100.00, user_id)
-    models.insert_expense('2025-10-12', category_id, 'Oct Week 2', 150.00, user_id)
-    models.insert_expense('2025-10-19', category_id, 'Oct Week 3', 200.00, user_id)
-    models.insert_expense('2025-10-26', category_id, 'Oct Week 4', 175.00, user_id)
+    models.bulk_insert_expenses([
+        ('2025-10-05', category_id, 'Oct Week 1', 100.00, user_id),
+        ('2025-10-12', category_id, 'Oct Week 2', 150.00, user_id),
+        ('2025-10-19', category_id, 'Oct Week 3', 200.00, user_id),
+        ('2025-10-26', category_id, 'Oct Week 4', 175.00, user_id),
+    ])
     
     # November expenses
-    models.insert_expense('2025-11-02', category_id, 'Nov Week 1', 125.00, user_id)
-    models.insert_expense('2025-11-09', category_id, 'Nov Week 2', 180.00, user_id)
+    models.bulk_insert_expenses([
+        ('2025-11-02', category_id, 'Nov Week 1', 125.00, user_id),
+        ('2025-11-09', category_id, 'Nov Week 2', 180.00, user_id),
+    ])
     
     # When: The user views expenses for October
     october_expenses = expense_operations.view_expenses_by_date(
@@ -354,7 +368,7 @@ def test_user_can_track_expenses_over_time(clean_db):
     assert november_summary['total'] == 305.00, "November total should be 305.00"
 
 
-def test_multiple_users_independent_tracking(clean_db):
+def test_multiple_users_independent_tracking(clean_db, default_categories):
     """
     User Story: As a user, I want my expenses tracked separately from other users
     so that each person's spending is independent
@@ -363,17 +377,21 @@ def test_multiple_users_independent_tracking(clean_db):
     user1_id = models.create_user("Kate")
     user2_id = models.create_user("Leo")
     
-    categories = models.get_all_categories()
+    categories = default_categories
     category_id = categories[0]['id']
     
     # Kate's expenses
-    models.insert_expense('2025-10-25', category_id, 'Kate Exp 1', 100.00, user1_id)
-    models.insert_expense('2025-10-25', category_id, 'Kate Exp 2', 50.00, user1_id)
+    models.bulk_insert_expenses([
+        ('2025-10-25', category_id, 'Kate Exp 1', 100.00, user1_id),
+        ('2025-10-25', category_id, 'Kate Exp 2', 50.00, user1_id),
+    ])
     
     # Leo's expenses
-    models.insert_expense('2025-10-25', category_id, 'Leo Exp 1', 200.00, user2_id)
-    models.insert_expense('2025-10-25', category_id, 'Leo Exp 2', 75.00, user2_id)
-    models.insert_expense('2025-10-25', category_id, 'Leo Exp 3', 25.00, user2_id)
+    models.bulk_insert_expenses([
+        ('2025-10-25', category_id, 'Leo Exp 1', 200.00, user2_id),
+        ('2025-10-25', category_id, 'Leo Exp 2', 75.00, user2_id),
+        ('2025-10-25', category_id, 'Leo Exp 3', 25.00, user2_id),
+    ])
     
     # When: Each user views their expenses
     kate_expenses = expense_operations.view_expenses_by_user(user1_id)
@@ -39,7 +39,7 @@ def test_complete_expense_workflow(clean_db):
     assert expenses[0]['amount'] == 75.00
 
 
-def test_multiple_users_multiple_expenses(clean_db):
+def test_multiple_users_multiple_expenses(clean_db, default_categories):
     """Test complex scenario with multiple users and expenses"""
     # Create multiple users
     user1_id = models.create_user("User1")
@@ -47,16 +47,18 @@ def test_multiple_users_multiple_expenses(clean_db):
     user3_id = models.create_user("User3")
     
     # Get categories
-    categories = models.get_all_categories()
+    categories = default_categories
     cat1 = categories[0]
     cat2 = categories[1]
     
     # Create expenses for different users
-    models.insert_expense('2025-10-20', cat1['id'], 'Expense 1', 100.00, user1_id)
-    models.insert_expense('2025-10-21', cat2['id'], 'Expense 2', 50.00, user1_id)
-    models.insert_expense('2025-10-22', cat1['id'], 'Expense 3', 75.00, user2_id)
-    models.insert_expense('2025-10-23', cat2['id'], 'Expense 4', 25.00, user2_id)
-    models.insert_expense('2025-10-24', cat1['id'], 'Expense 5', 200.00, user3_id)
+    models.bulk_insert_expenses([
+        ('2025-10-20', cat1['id'], 'Expense 1', 100.00, user1_id),
+        ('2025-10-21', cat2['id'], 'Expense 2', 50.00, user1_id),
+        ('2025-10-22', cat1['id'], 'Expense 3', 75.00, user2_id),
+        ('2025-10-23', cat2['id'], 'Expense 4', 25.00, user2_id),
+        ('2025-10-24', cat1['id'], 'Expense 5', 200.00, user3_id),
+    ])
     
     # Test viewing all expenses
     all_expenses = expense_operations.view_all_expenses()
@@ -130,22 +132,18 @@ def test_record_expense_with_auto_creation(clean_db):
     assert expenses[0]['category_name'] == 'AutoCategory'
 
 
-def test_database_transaction_consistency(clean_db):
+def test_database_transaction_consistency(clean_db, default_categories):
     """Test that database operations maintain consistency"""
     # Create user and category
     user_id = models.create_user("TransactionUser")
-    categories = models.get_all_categories()
+    categories = default_categories
     category_id = categories[0]['id']
     
     # Create multiple expenses (starting from 1 to avoid zero amount)
-    for i in range(1, 11):
-        models.insert_expense(
-            date='2025-10-25',
-            category_id=category_id,
-            title=f'Expense {i}',
-            amount=float(i * 10),
-            user_id=user_id
-        )
+    models.bulk_insert_expenses([
+        ('2025-10-25', category_id, f'Expense {i}', float(i * 10), user_id)
+        for i in range(1, 11)
+    ])
     
     # Verify all expenses were created
     expenses = expense_operations.view_all_expenses()
@@ -157,7 +155,7 @@ def test_database_transaction_consistency(clean_db):
     assert abs(summary['total'] - expected_total) < 0.01, "Total should match expected"
 
 
-def test_foreign_key_constraints(clean_db, sample_user):
+def test_foreign_key_constraints(clean_db, sample_user, default_categories):
     """Test that foreign key constraints are enforced"""
     # Try to create expense with invalid category_id
     with pytest.raises(Exception):  # Should raise IntegrityError
@@ -170,7 +168,7 @@ def test_foreign_key_constraints(clean_db, sample_user):
         )
     
     # Try to create expense with invalid user_id
-    categories = models.get_all_categories()
+    categories = default_categories
     with pytest.raises(Exception):  # Should raise IntegrityError
         models.insert_expense(
             date='2025-10-25',
@@ -181,14 +179,14 @@ def test_foreign_key_constraints(clean_db, sample_user):
         )
 
 
-def test_concurrent_expense_creation(clean_db):
+def test_concurrent_expense_creation(clean_db, default_categories):
     """Test creating multiple expenses concurrently"""
     # Create users
     user1_id = models.create_user("ConcurrentUser1")
     user2_id = models.create_user("ConcurrentUser2")
     
     # Get categories
-    categories = models.get_all_categories()
+    categories = default_categories
     cat1 = categories[0]
     cat2 = categories[1]
     
@@ -236,11 +234,11 @@ def test_data_integrity_across_operations(clean_db):
     assert expense['category_name'] == initial_categories[0]['name'], "Expense should link to correct category"
 
 
-def test_filtering_combinations(clean_db, multiple_expenses):
+def test_filtering_combinations(clean_db, multiple_expenses, default_categories):
     """Test various combinations of filters"""
     # Get test data
     users = models.get_all_users()
-    categories = models.get_all_categories()
+    categories = default_categories
     
     # Test date + amount filters
     expenses1 = models.fetch_expenses_by_filters(
@@ -282,16 +280,18 @@ def test_filtering_combinations(clean_db, multiple_expenses):
         assert exp['user_name'] == users[0]['name']
 
 
-def test_summary_calculation_accuracy(clean_db):
+def test_summary_calculation_accuracy(clean_db, default_categories):
     """Test that summary calculations are accurate"""
     # Create test data with known values
     user_id = models.create_user("SummaryUser")
-    categories = models.get_all_categories()
+    categories = default_categories
     
     # Create expenses with specific amounts
-    models.insert_expense('2025-10-25', categories[0]['id'], 'Exp1', 100.00, user_id)
-    models.insert_expense('2025-10-25', categories[1]['id'], 'Exp2', 200.00, user_id)
-    models.insert_expense('2025-10-25', categories[0]['id'], 'Exp3', 150.00, user_id)
+    models.bulk_insert_expenses([
+        ('2025-10-25', categories[0]['id'], 'Exp1', 100.00, user_id),
+        ('2025-10-25', categories[1]['id'], 'Exp2', 200.00, user_id),
+        ('2025-10-25', categories[0]['id'], 'Exp3', 150.00, user_id),
+    ])
     
     # Calculate summary
     summary = expense_operations.calculate_summary()
@@ -19,6 +19,11 @@ def test_validate_date_valid_format():
     assert result == '2025-10-25', "Should return the validated date"
 
 
+def test_validate_date_leap_day():
+    """Test validate_date accepts Feb 29 in a leap year"""
+    assert utils.validate_date('2024-02-29') == '2024-02-29'
+
+
 def test_validate_date_invalid_format_raises_error():
     """Test validate_date raises error for invalid format"""
     with pytest.raises(ValueError) as exc_info:
@@ -35,25 +40,21 @@ def test_validate_date_invalid_date_raises_error():
     assert "Invalid date" in str(exc_info.value)
 
 
-def test_validate_date_empty_raises_error():
-    """Test validate_date raises error for empty string"""
+@pytest.mark.parametrize("blank", ['', '   '])
+def test_validate_date_blank_raises_error(blank):
+    """Test validate_date raises error for an empty or whitespace-only string"""
     with pytest.raises(ValueError) as exc_info:
-        utils.validate_date('')
+        utils.validate_date(blank)
     
     assert "cannot be empty" in str(exc_info.value)
 
 
-def test_validate_date_whitespace_raises_error():
-    """Test validate_date raises error for whitespace"""
-    with pytest.raises(ValueError):
-        utils.validate_date('   ')
-
-
 @pytest.mark.parametrize("invalid_date", [
     '2025-13-01',  # Invalid month
     '2025-00-01',  # Invalid month
     '2025-01-32',  # Invalid day
     '2025-01-00',  # Invalid day
+    '2025-02-29',  # Not a leap year
     '25-10-2025',  # Wrong format
     '2025/10/25',  # Wrong separator
 ])
@@ -63,6 +64,14 @@ def test_validate_date_various_invalid_formats(invalid_date):
         utils.validate_date(invalid_date)
 
 
+def test_validate_date_non_ascii_digits_fail_format_check():
+    """Test full-width digits are rejected by the format check itself"""
+    with pytest.raises(ValueError) as exc_info:
+        utils.validate_date('２０２５-１０-２５')
+    
+    assert "YYYY-MM-DD format" in str(exc_info.value)
+
+
 def test_validate_amount_valid():
     """Test validate_amount accepts valid positive numbers"""
     result = utils.validate_amount('50.00')
@@ -75,26 +84,28 @@ def test_validate_amount_valid():
     assert result == 0.01, "Should handle small amounts"
 
 
-def test_validate_amount_negative_raises_error():
-    """Test validate_amount raises error for negative amounts"""
+@pytest.mark.parametrize("amount", ['-10.00', '0'])
+def test_validate_amount_non_positive_raises_error(amount):
+    """Test validate_amount raises error for negative and zero amounts"""
     with pytest.raises(ValueError) as exc_info:
-        utils.validate_amount('-10.00')
+        utils.validate_amount(amount)
     
     assert "must be positive" in str(exc_info.value)
 
 
-def test_validate_amount_zero_raises_error():
-    """Test validate_amount raises error for zero"""
+def test_validate_amount_non_numeric_raises_error():
+    """Test validate_amount raises error for non-numeric input"""
     with pytest.raises(ValueError) as exc_info:
-        utils.validate_amount('0')
+        utils.validate_amount('abc')
     
-    assert "must be positive" in str(exc_info.value)
+    assert "valid number" in str(exc_info.value)
 
 
-def test_validate_amount_non_numeric_raises_error():
-    """Test validate_amount raises error for non-numeric input"""
+@pytest.mark.parametrize("amount", ['nan', 'inf', '-inf'])
+def test_validate_amount_non_finite_raises_error(amount):
+    """Test validate_amount rejects values float() parses but no expense can have"""
     with pytest.raises(ValueError) as exc_info:
-        utils.validate_amount('abc')
+        utils.validate_amount(amount)
     
     assert "valid number" in str(exc_info.value)
 
@@ -116,21 +127,16 @@ def test_validate_non_empty_valid():
     assert result == 'Test', "Should strip whitespace"
 
 
-def test_validate_non_empty_raises_error():
-    """Test validate_non_empty raises error for empty string"""
+@pytest.mark.parametrize("blank", ['', '   '])
+def test_validate_non_empty_raises_error(blank):
+    """Test validate_non_empty raises error for an empty or whitespace-only string"""
     with pytest.raises(ValueError) as exc_info:
-        utils.validate_non_empty('', 'TestField')
+        utils.validate_non_empty(blank, 'TestField')
     
     assert "TestField" in str(exc_info.value), "Error should mention field name"
     assert "cannot be empty" in str(exc_info.value)
 
 
-def test_validate_non_empty_whitespace_raises_error():
-    """Test validate_non_empty raises error for whitespace"""
-    with pytest.raises(ValueError):
-        utils.validate_non_empty('   ', 'Field')
-
-
 # ============================================================================
 # FORMATTING TESTS
 # ============================================================================
@@ -151,6 +157,19 @@ def test_format_currency_rounds_correctly():
     assert utils.format_currency(50.125) == '$50.12'
 
 
+def test_format_currency_cached():
+    """Test repeated amounts are served from the cache and zero never prints a sign"""
+    utils._format_amount.cache_clear()
+    assert utils.format_currency(2.675) == '$2.67', "Should round like %.2f"
+    assert utils.format_currency(2.675) == '$2.67'
+    assert utils._format_amount.cache_info().hits == 1, "Repeated amount should hit the cache"
+    
+    assert utils.format_currency(-0.0) == '$0.00'
+    assert utils.format_currency(-0.001) == '$0.00', "Amounts rounding to zero should not print a sign"
+    assert utils.format_currency(0.0) == '$0.00'
+    assert utils.format_currency(-0.5) == '$-0.50'
+
+
 def test_format_expense_output_empty():
     """Test format_expense_output with empty list"""
     result = utils.format_expense_output([])
@@ -386,6 +405,17 @@ def test_get_menu_choice_zero(monkeypatch):
     assert result == 0
 
 
+def test_get_menu_choice_reprompts_on_bad_input(monkeypatch, capsys):
+    """Test get_menu_choice asks again after non-numeric and out-of-range input"""
+    inputs = iter(['abc', '-1', '9', '2'])
+    monkeypatch.setattr('builtins.input', lambda _: next(inputs))
+    
+    assert utils.get_menu_choice(5) == 2
+    output = capsys.readouterr().out
+    assert output.count("Please enter a valid number") == 2
+    assert "Please enter a number between 0 and 5" in output
+
+
 def test_get_menu_choice_max(monkeypatch):
     """Test get_menu_choice accepts maximum value"""
     monkeypatch.setattr('builtins.input', lambda _: '5')
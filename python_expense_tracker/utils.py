@@ -3,11 +3,19 @@ Utility functions for Expense Tracking System
 Handles validation, formatting, and helper functions
 """
 
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+import math
+from datetime import date
+from functools import lru_cache
+from operator import itemgetter
+from typing import List, Dict, Any, Mapping, Optional, Sequence
 import re
 
 
+# Strict YYYY-MM-DD shape in ASCII digits (\d would also match other
+# scripts' digits); date.fromisoformat alone would also accept forms such as YYYYMMDD
+_DATE_RE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}')
+
+
 def validate_date(date_string: str) -> str:
     """
     Parse and validate date format (YYYY-MM-DD)
@@ -21,18 +29,18 @@ def validate_date(date_string: str) -> str:
     Raises:
         ValueError: If date format is invalid or date is invalid
     """
-    if not date_string or not date_string.strip():
+    date_string = date_string.strip() if date_string else ''
+    if not date_string:
         raise ValueError("Date cannot be empty")
     
-    date_string = date_string.strip()
-    
     # Check format with regex
-    if not re.match(r'^\d{4}-\d{2}-\d{2}$', date_string):
+    if not _DATE_RE.fullmatch(date_string):
         raise ValueError("Date must be in YYYY-MM-DD format")
     
     try:
-        # Parse the date to validate it's a real date
-        datetime.strptime(date_string, '%Y-%m-%d')
+        # Parse in C to validate it's a real date (month lengths, leap days);
+        # much cheaper than datetime.strptime
+        date.fromisoformat(date_string)
         return date_string
     except ValueError as e:
         raise ValueError(f"Invalid date: {e}")
@@ -51,18 +59,21 @@ def validate_amount(amount_str: str) -> float:
     Raises:
         ValueError: If amount is invalid or not positive
     """
-    if not amount_str or not amount_str.strip():
+    amount_str = amount_str.strip() if amount_str else ''
+    if not amount_str:
         raise ValueError("Amount cannot be empty")
     
     try:
-        amount = float(amount_str.strip())
-        if amount <= 0:
-            raise ValueError("Amount must be positive")
-        return amount
-    except ValueError as e:
-        if "could not convert" in str(e):
-            raise ValueError("Amount must be a valid number")
-        raise
+        amount = float(amount_str)
+    except ValueError:
+        raise ValueError("Amount must be a valid number")
+    
+    # float() also parses 'nan' and 'inf', which no expense can have
+    if not math.isfinite(amount):
+        raise ValueError("Amount must be a valid number")
+    if amount <= 0:
+        raise ValueError("Amount must be positive")
+    return amount
 
 
 def validate_non_empty(value: str, field_name: str) -> str:
@@ -79,14 +90,16 @@ def validate_non_empty(value: str, field_name: str) -> str:
     Raises:
         ValueError: If value is empty
     """
-    if not value or not value.strip():
+    value = value.strip() if value else ''
+    if not value:
         raise ValueError(f"{field_name} cannot be empty")
-    return value.strip()
+    return value
 
 
 def format_currency(amount: float) -> str:
     """
     Format amount as currency with 2 decimal places
+    Results are memoized per amount, since reports repeat the same values
     
     Args:
         amount: Amount to format
@@ -94,15 +107,23 @@ def format_currency(amount: float) -> str:
     Returns:
         str: Formatted currency string
     """
+    # round() rounds exactly like '.2f'; adding 0.0 turns the -0.0 it gives for
+    # -0.0 or tiny negatives such as -0.001 into 0.0, so '$-0.00' never prints
+    return _format_amount(round(amount, 2) + 0.0)
+
+
+@lru_cache(maxsize=4096)
+def _format_amount(amount: float) -> str:
+    """Format one amount; cached by format_currency"""
     return f"${amount:.2f}"
 
 
-def format_expense_output(expenses: List[Dict]) -> str:
+def format_expense_output(expenses: Sequence[Mapping[str, Any]]) -> str:
     """
     Pretty-print expense records in table format
     
     Args:
-        expenses: List of expense dictionaries
+        expenses: Expense rows (sqlite3.Row or dict) to display
         
     Returns:
         str: Formatted table string
@@ -110,31 +131,42 @@ def format_expense_output(expenses: List[Dict]) -> str:
     if not expenses:
         return "No expenses found."
     
-    # Calculate column widths
-    max_id_width = max(len(str(exp['id'])) for exp in expenses)
-    max_date_width = max(len(exp['date']) for exp in expenses)
-    max_title_width = max(len(exp['title']) for exp in expenses)
-    max_amount_width = max(len(format_currency(exp['amount'])) for exp in expenses)
-    max_category_width = max(len(exp['category_name']) for exp in expenses)
-    max_user_width = max(len(exp['user_name']) for exp in expenses)
-    
-    # Set minimum widths
-    id_width = max(max_id_width, 3)
-    date_width = max(max_date_width, 10)
-    title_width = max(max_title_width, 5)
-    amount_width = max(max_amount_width, 7)
-    category_width = max(max_category_width, 8)
-    user_width = max(max_user_width, 4)
+    # Calculate column widths in one pass, starting from the minimum widths;
+    # the stringified ids and formatted amounts are kept for the row loop
+    id_width, date_width, title_width = 3, 10, 5
+    amount_width, category_width, user_width = 7, 8, 4
+    ids = []
+    amounts = []
+    for expense in expenses:
+        expense_id = str(expense['id'])
+        amount = format_currency(expense['amount'])
+        ids.append(expense_id)
+        amounts.append(amount)
+        id_width = max(id_width, len(expense_id))
+        date_width = max(date_width, len(expense['date']))
+        title_width = max(title_width, len(expense['title']))
+        amount_width = max(amount_width, len(amount))
+        category_width = max(category_width, len(expense['category_name']))
+        user_width = max(user_width, len(expense['user_name']))
     
     # Create header
     header = f"{'ID':<{id_width}} | {'Date':<{date_width}} | {'Title':<{title_width}} | {'Amount':<{amount_width}} | {'Category':<{category_width}} | {'User':<{user_width}}"
     separator = "-" * len(header)
     
-    # Create rows
+    # Create rows; padding with str.ljust and one join per row avoids
+    # re-parsing a nested-width format spec for every field
     rows = []
-    for expense in expenses:
-        row = f"{expense['id']:<{id_width}} | {expense['date']:<{date_width}} | {expense['title']:<{title_width}} | {format_currency(expense['amount']):<{amount_width}} | {expense['category_name']:<{category_width}} | {expense['user_name']:<{user_width}}"
-        rows.append(row)
+    append_row = rows.append
+    join_fields = " | ".join
+    for expense, expense_id, amount in zip(expenses, ids, amounts):
+        append_row(join_fields((
+            expense_id.ljust(id_width),
+            expense['date'].ljust(date_width),
+            expense['title'].ljust(title_width),
+            amount.ljust(amount_width),
+            expense['category_name'].ljust(category_width),
+            expense['user_name'].ljust(user_width),
+        )))
     
     return "\n".join([header, separator] + rows)
 
@@ -164,31 +196,36 @@ def format_summary_output(summary: Dict[str, Any]) -> str:
             
             # Create table for this user's expenses
             if expenses:
-                # Calculate column widths for this user's expenses
-                max_date_width = max(len(exp['date']) for exp in expenses)
-                max_title_width = max(len(exp['title']) for exp in expenses)
-                max_amount_width = max(len(format_currency(exp['amount'])) for exp in expenses)
-                max_category_width = max(len(exp['category_name']) for exp in expenses)
-                
-                # Set minimum widths
-                date_width = max(max_date_width, 10)
-                title_width = max(max_title_width, 15)
-                amount_width = max(max_amount_width, 8)
-                category_width = max(max_category_width, 10)
+                # Calculate column widths for this user's expenses in one pass,
+                # starting from the minimum widths
+                date_width, title_width, amount_width, category_width = 10, 15, 8, 10
+                amounts = []
+                for expense in expenses:
+                    amount = format_currency(expense['amount'])
+                    amounts.append(amount)
+                    date_width = max(date_width, len(expense['date']))
+                    title_width = max(title_width, len(expense['title']))
+                    amount_width = max(amount_width, len(amount))
+                    category_width = max(category_width, len(expense['category_name']))
                 
                 # Create header for user's table
                 header = f"{'Date':<{date_width}} | {'Title':<{title_width}} | {'Amount':<{amount_width}} | {'Category':<{category_width}}"
+                separator = "-" * len(header)
                 output.append(header)
-                output.append("-" * len(header))
+                output.append(separator)
                 
                 # Add expense rows
-                for expense in expenses:
-                    row = f"{expense['date']:<{date_width}} | {expense['title']:<{title_width}} | {format_currency(expense['amount']):<{amount_width}} | {expense['category_name']:<{category_width}}"
-                    output.append(row)
+                for expense, amount in zip(expenses, amounts):
+                    output.append(" | ".join((
+                        expense['date'].ljust(date_width),
+                        expense['title'].ljust(title_width),
+                        amount.ljust(amount_width),
+                        expense['category_name'].ljust(category_width),
+                    )))
                 
                 # Add user's total
                 user_total = summary['by_user'][user]
-                output.append("-" * len(header))
+                output.append(separator)
                 output.append(f"{'TOTAL':<{date_width}} | {'':<{title_width}} | {format_currency(user_total):<{amount_width}} | {len(expenses)} expense(s)")
             
             output.append("")
@@ -206,7 +243,7 @@ def format_summary_output(summary: Dict[str, Any]) -> str:
     if summary['by_category'] and summary['total'] > 0:
         output.append("CATEGORY BREAKDOWN (with Percentages):")
         # Sort categories by amount (descending) for better readability
-        sorted_categories = sorted(summary['by_category'].items(), key=lambda x: x[1], reverse=True)
+        sorted_categories = sorted(summary['by_category'].items(), key=itemgetter(1), reverse=True)
         
         for category, amount in sorted_categories:
             percentage = (amount / summary['total']) * 100
@@ -327,13 +364,16 @@ def get_menu_choice(max_choice: int) -> int:
     while True:
         try:
             choice = input(f"\nEnter your choice (0-{max_choice}): ").strip()
-            choice_num = int(choice)
-            if 0 <= choice_num <= max_choice:
-                return choice_num
-            else:
-                print(f"Please enter a number between 0 and {max_choice}")
-        except ValueError:
-            print("Please enter a valid number")
         except KeyboardInterrupt:
             print("\nOperation cancelled.")
             return 0
+        
+        # Check the digits up front instead of catching int()'s ValueError
+        if not choice.isdecimal():
+            print("Please enter a valid number")
+            continue
+        
+        choice_num = int(choice)
+        if 0 <= choice_num <= max_choice:
+            return choice_num
+        print(f"Please enter a number between 0 and {max_choice}")